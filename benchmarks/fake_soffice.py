@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Stand-in for LibreOffice's ``soffice`` used by the benchmarks.
+
+Understands the subset of the command line the converters use
+(``--headless --convert-to pdf --outdir DIR FILE...``), prints soffice's
+"convert ... -> ..." progress lines and writes a small synthetic PDF per input
+after ``FAKE_SOFFICE_DELAY`` seconds (default 0.005). ``FAKE_SOFFICE_PAGES``
+sets the page count (default 3).
+"""
+import os
+import sys
+import time
+from typing import List
+
+
+def synthetic_pdf(pages: int, label: str = "") -> bytes:
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids: List[str] = []
+    for page in range(pages):
+        text = f"BT /F1 24 Tf 72 720 Td ({label} slide {page + 1}) Tj ET".encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 960 540] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    body = bytearray(b"%PDF-1.4\n")
+    offsets: List[int] = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        body += b"%010d 00000 n \n" % offset
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(body)
+
+
+def main(argv: List[str]) -> int:
+    if "--version" in argv:
+        print("LibreOffice 0.0.0 fake-soffice")
+        return 0
+
+    outdir = "."
+    files: List[str] = []
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg in ("--outdir", "--convert-to"):
+            if arg == "--outdir":
+                outdir = argv[index + 1]
+            index += 2
+            continue
+        if not arg.startswith("-"):
+            files.append(arg)
+        index += 1
+
+    delay = float(os.environ.get("FAKE_SOFFICE_DELAY", "0.005"))
+    pages = int(os.environ.get("FAKE_SOFFICE_PAGES", "3"))
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output = os.path.join(outdir, f"{stem}.pdf")
+        print(f"convert {path} as a Impress document -> {output} using filter : impress_pdf_Export", flush=True)
+        time.sleep(delay)
+        with open(output, "wb") as handle:
+            handle.write(synthetic_pdf(pages, stem))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Checks that streaming merges produce the same pages as normal merges.
+
+Builds a few input PDFs, merges them once with pypdf's writer and once with
+the streaming writer used above ``PPT2PDF_MERGE_STREAM_THRESHOLD``, and
+compares the two outputs: every page's size, crop box, rotation, fonts and
+text, and the outline (bookmark titles, nesting and target pages). One input
+sets its page size, rotation and resources on ``/Pages`` nodes instead of on
+the pages, which the streaming writer must copy down, and one has an outline
+using direct, named and GoTo-action destinations. Exits 1 when anything
+differs.
+
+    python benchmarks/merge_check.py
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+
+# A two-level page tree: the root /Pages node sets the media box, rotation and
+# fonts, the intermediate node the crop box, and the pages only their content.
+def inherited_attributes_pdf(pages: int, label: str) -> bytes:
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids: List[str] = []
+    for page in range(pages):
+        text = f"BT /F1 24 Tf 72 300 Td ({label} slide {page + 1}) Tj ET".encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+        objects.append(b"<< /Type /Page /Parent 3 0 R /Contents %d 0 R >>" % len(objects))
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = (
+        b"<< /Type /Pages /Kids [3 0 R] /Count %d /MediaBox [0 0 960 540] /Rotate 90 "
+        b"/Resources << /Font << /F1 4 0 R >> >> >>" % pages
+    )
+    objects[2] = f"<< /Type /Pages /Parent 2 0 R /Kids [{' '.join(kids)}] /Count {pages} /CropBox [0 0 900 500] >>".encode()
+
+    return _pdf_file(objects)
+
+
+# Three pages with a two-level outline. The first item points at its page
+# directly, its child through a GoTo action to a named destination, and the
+# last item through the named destination itself.
+def outlined_pdf(label: str) -> bytes:
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R /Outlines 3 0 R /Names << /Dests << /Names [(second) [7 0 R /Fit] (third) [9 0 R /Fit]] >> >> >>",
+        b"<< /Type /Pages /Kids [5 0 R 7 0 R 9 0 R] /Count 3 >>",
+        b"<< /Type /Outlines /First 11 0 R /Last 13 0 R /Count 3 >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page in range(3):
+        text = f"BT /F1 24 Tf 72 300 Td ({label} slide {page + 1}) Tj ET".encode("latin-1", "replace")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 960 540] /Resources << /Font << /F1 4 0 R >> >> "
+            b"/Contents %d 0 R >>" % (len(objects) + 2)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+    objects += [
+        f"<< /Title ({label} intro) /Parent 3 0 R /Next 13 0 R /First 12 0 R /Last 12 0 R /Count 1 "
+        f"/Dest [5 0 R /XYZ 0 540 0] >>".encode(),
+        f"<< /Title ({label} detail) /Parent 11 0 R /A << /S /GoTo /D (second) >> >>".encode(),
+        f"<< /Title ({label} end) /Parent 3 0 R /Prev 11 0 R /Dest (third) >>".encode(),
+    ]
+    return _pdf_file(objects)
+
+
+def _pdf_file(objects: List[bytes]) -> bytes:
+    body = bytearray(b"%PDF-1.4\n")
+    offsets: List[int] = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        body += b"%010d 00000 n \n" % offset
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(body)
+
+
+# pypdf raises when a page has no usable box, which is one of the differences
+# this check looks for.
+def _box(page: Any, name: str) -> Optional[List[float]]:
+    try:
+        return [float(value) for value in getattr(page, name)]
+    except ValueError:
+        return None
+
+
+def describe_pages(path: str) -> List[Dict[str, Any]]:
+    from pypdf import PdfReader
+
+    pages = []
+    for page in PdfReader(path).pages:
+        resources = page.get("/Resources")
+        fonts = resources.get("/Font") if resources is not None else None
+        pages.append({
+            "mediabox": _box(page, "mediabox"),
+            "cropbox": _box(page, "cropbox"),
+            "rotation": page.rotation,
+            "fonts": sorted(fonts.keys()) if fonts is not None else [],
+            "text": page.extract_text().strip(),
+        })
+    return pages
+
+
+# (depth, title, page number) for every outline item, in document order.
+def describe_outline(path: str) -> List[Tuple[int, str, Optional[int]]]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    items: List[Tuple[int, str, Optional[int]]] = []
+
+    def walk(entries: List[Any], depth: int) -> None:
+        for entry in entries:
+            if isinstance(entry, list):
+                walk(entry, depth + 1)
+            else:
+                items.append((depth, entry.title, reader.get_destination_page_number(entry)))
+
+    walk(reader.outline, 0)
+    return items
+
+
+def merge(inputs: List[str], output_path: str, stream_threshold: Optional[int]) -> None:
+    from services.pdf_merge import OrderedPdfMerger
+
+    merger = OrderedPdfMerger(len(inputs), output_path, stream_threshold)
+    try:
+        for index, path in enumerate(inputs):
+            merger.add(index, path)
+        merger.write()
+    finally:
+        merger.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PPT 2 PDF streaming merge check")
+    parser.add_argument("--pages", type=int, default=3, help="pages per input PDF (default: 3)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    from fake_soffice import synthetic_pdf
+
+    work_dir = tempfile.mkdtemp(prefix="ppt2pdf-merge-check-")
+    try:
+        inputs = []
+        for name, content in (
+            ("plain_a.pdf", synthetic_pdf(args.pages, "plain a")),
+            ("inherited.pdf", inherited_attributes_pdf(args.pages, "inherited")),
+            ("outlined.pdf", outlined_pdf("outlined")),
+            ("plain_b.pdf", synthetic_pdf(args.pages, "plain b")),
+        ):
+            path = os.path.join(work_dir, name)
+            with open(path, "wb") as handle:
+                handle.write(content)
+            inputs.append(path)
+
+        normal_path = os.path.join(work_dir, "normal.pdf")
+        streaming_path = os.path.join(work_dir, "streaming.pdf")
+        merge(inputs, normal_path, None)
+        merge(inputs, streaming_path, 0)
+        normal = describe_pages(normal_path)
+        streaming = describe_pages(streaming_path)
+        normal_outline = describe_outline(normal_path)
+        streaming_outline = describe_outline(streaming_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    failures: List[str] = []
+    if len(normal) != len(streaming):
+        failures.append(f"page count: normal {len(normal)}, streaming {len(streaming)}")
+    for number, (expected, actual) in enumerate(zip(normal, streaming), start=1):
+        for field, value in expected.items():
+            if actual[field] != value:
+                failures.append(f"page {number} {field}: normal {value!r}, streaming {actual[field]!r}")
+    if normal_outline != streaming_outline:
+        failures.append(f"outline: normal {normal_outline!r}, streaming {streaming_outline!r}")
+
+    if failures:
+        print("Streaming merge differs from the normal merge:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print(f"Streaming and normal merges match ({len(normal)} pages, {len(normal_outline)} bookmarks).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
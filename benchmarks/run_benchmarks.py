@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""Throughput/latency benchmarks for the conversion pipeline.
+
+Runs every scenario in its own child process against ``fake_soffice.py`` (so
+no office suite is needed and peak RSS is per scenario), prints a table and
+compares it with ``baseline.json``. Exits with status 1 when any scenario is
+slower or larger than the baseline by more than ``--tolerance``.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1,10,100 --workers 1,4
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+FAKE_SOFFICE = os.path.join(BENCH_DIR, "fake_soffice.py")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# metric -> True when higher is better
+COMPARED_METRICS = {
+    "throughput": True,
+    "p95_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[position]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def install_fake_soffice(bin_dir: str) -> str:
+    os.makedirs(bin_dir, exist_ok=True)
+    if sys.platform == "win32":
+        path = os.path.join(bin_dir, "soffice.bat")
+        with open(path, "w") as handle:
+            handle.write(f'@"{sys.executable}" "{FAKE_SOFFICE}" %*\n')
+        return path
+
+    path = os.path.join(bin_dir, "soffice")
+    with open(path, "w") as handle:
+        handle.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_SOFFICE}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+def _minimal_pptx() -> bytes:
+    # Just enough of a .pptx to pass the preflight check; the fake backend
+    # never reads it.
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("ppt/presentation.xml", '<p:presentation xmlns:p="urn:bench"/>')
+        archive.writestr("ppt/slides/slide1.xml", "<p:sld/>")
+    return buffer.getvalue()
+
+
+def make_decks(directory: str, count: int) -> List[str]:
+    os.makedirs(directory, exist_ok=True)
+    content = _minimal_pptx()
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"deck_{index:05d}.pptx")
+        with open(path, "wb") as handle:
+            handle.write(content)
+        paths.append(path)
+    return paths
+
+
+def bench_subprocess(work_dir: str, files: int, _workers: int) -> Tuple[float, List[float]]:
+    from services.conversion_runtime import run_cancellable_subprocess
+
+    soffice = shutil.which("soffice")
+    decks = make_decks(os.path.join(work_dir, "decks"), files)
+    out_dir = os.path.join(work_dir, "out")
+    os.makedirs(out_dir)
+
+    latencies = []
+    started = time.perf_counter()
+    for deck in decks:
+        call_started = time.perf_counter()
+        result = run_cancellable_subprocess(
+            [soffice, "--headless", "--convert-to", "pdf", "--outdir", out_dir, deck],
+            timeout=60,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"fake soffice failed: {result.stderr}")
+        latencies.append(time.perf_counter() - call_started)
+    return time.perf_counter() - started, latencies
+
+
+def bench_workflow(work_dir: str, files: int, workers: int) -> Tuple[float, List[float]]:
+    import threading
+
+    from services.backend_support import BackendSupport
+    from services.conversion_settings import ConversionSettings
+    from services.conversion_types import ConversionBackend
+    from services.conversion_workflows import ConversionWorkflows
+    from services.converter_service import ConversionService
+    from services.preflight import check_presentation
+
+    decks = make_decks(os.path.join(work_dir, "decks"), files)
+    out_dir = os.path.join(work_dir, "out")
+    os.makedirs(out_dir)
+
+    service = ConversionService(
+        backend_support=BackendSupport(preferred_backend=ConversionBackend.LIBREOFFICE),
+        settings=ConversionSettings(
+            max_workers=workers,
+            cache_enabled=False,
+            timeout_history_path=os.environ["PPT2PDF_TIMEOUT_HISTORY_FILE"],
+        ),
+    )
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    # Latency is measured per file, from the moment the backend starts it to the
+    # moment its conversion unit (a single file or a whole batch) has finished.
+    def timed_single(input_path, output_path, is_cancelled=None):
+        call_started = time.perf_counter()
+        service.ppt_to_pdf(input_path, output_path, is_cancelled)
+        with lock:
+            latencies.append(time.perf_counter() - call_started)
+
+    def timed_batch(jobs, on_file_started=None, is_cancelled=None):
+        starts: Dict[int, float] = {}
+
+        def on_started(position: int) -> None:
+            starts[position] = time.perf_counter()
+            if on_file_started:
+                on_file_started(position)
+
+        batch_started = time.perf_counter()
+        service.ppt_to_pdf_batch(jobs, on_started, is_cancelled)
+        finished = time.perf_counter()
+        with lock:
+            latencies.extend(finished - starts.get(position, batch_started) for position in range(len(jobs)))
+
+    workflows = ConversionWorkflows(
+        timed_single,
+        convert_batch=timed_batch,
+        plan_batches=service.plan_batches,
+        max_workers=service.max_workers,
+        preflight=check_presentation,
+    )
+    started = time.perf_counter()
+    try:
+        outputs = workflows.convert_separate(decks, out_dir)
+    finally:
+        service.shutdown()
+    elapsed = time.perf_counter() - started
+    if len(outputs) != files:
+        raise RuntimeError(f"expected {files} PDFs, got {len(outputs)}")
+    return elapsed, latencies
+
+
+def bench_merge(work_dir: str, files: int, _workers: int) -> Tuple[float, List[float]]:
+    sys.path.insert(0, BENCH_DIR)
+    from fake_soffice import synthetic_pdf
+
+    from services.conversion_settings import ConversionSettings
+    from services.conversion_workflows import ConversionWorkflows
+
+    pdf_dir = os.path.join(work_dir, "pdfs")
+    os.makedirs(pdf_dir)
+    pdfs = []
+    for index in range(files):
+        path = os.path.join(pdf_dir, f"part_{index:05d}.pdf")
+        with open(path, "wb") as handle:
+            handle.write(synthetic_pdf(int(os.environ.get("FAKE_SOFFICE_PAGES", "3")), f"deck {index}"))
+        pdfs.append(path)
+
+    # pypdf is imported on first use; load it up front so the timing covers the merge only.
+    import pypdf  # noqa: F401
+
+    settings = ConversionSettings.from_env()
+    workflows = ConversionWorkflows(lambda *_args: None, merge_stream_threshold=settings.merge_stream_threshold)
+    started = time.perf_counter()
+    workflows.merge_pdfs(pdfs, os.path.join(work_dir, "merged.pdf"))
+    elapsed = time.perf_counter() - started
+    return elapsed, [elapsed]
+
+
+SCENARIOS = {
+    "subprocess": bench_subprocess,
+    "workflow": bench_workflow,
+    "merge": bench_merge,
+}
+
+
+def run_child(kind: str, files: int, workers: int) -> Dict[str, Any]:
+    sys.path.insert(0, REPO_ROOT)
+    work_dir = tempfile.mkdtemp(prefix="ppt2pdf-bench-")
+    try:
+        install_fake_soffice(os.path.join(work_dir, "bin"))
+        os.environ["PATH"] = os.path.join(work_dir, "bin") + os.pathsep + os.environ.get("PATH", "")
+        # Fake soffice runs take milliseconds; recorded in the user's timeout
+        # history they would shrink the timeouts of real conversions.
+        os.environ["PPT2PDF_TIMEOUT_HISTORY_FILE"] = os.path.join(work_dir, "timeouts.json")
+        elapsed, latencies = SCENARIOS[kind](work_dir, files, workers)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    p50 = percentile(latencies, 0.50)
+    p95 = percentile(latencies, 0.95)
+    rss = peak_rss_mb()
+    return {
+        "elapsed_s": round(elapsed, 4),
+        "throughput": round(files / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+        "p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+        "peak_rss_mb": round(rss, 1) if rss is not None else None,
+    }
+
+
+def scenario_matrix(sizes: List[int], worker_counts: List[int]) -> List[Tuple[str, str, int, int]]:
+    matrix = []
+    for files in sizes:
+        matrix.append((f"subprocess/{files}", "subprocess", files, 1))
+        for workers in worker_counts:
+            matrix.append((f"workflow/{files}/w{workers}", "workflow", files, workers))
+        matrix.append((f"merge/{files}", "merge", files, 1))
+    return matrix
+
+
+def run_scenario(kind: str, files: int, workers: int, repeat: int = 1) -> Dict[str, Any]:
+    env = dict(os.environ)
+    # Benchmarks must never read or write the user's real state: no PDF cache,
+    # and no saved backend detection, which would point at the fake soffice in
+    # a work directory that is deleted after the run. The timeout history goes
+    # to the work directory (see run_child).
+    env["PPT2PDF_CACHE"] = "0"
+    env["PPT2PDF_DETECTION_CACHE"] = "0"
+    runs = []
+    for _ in range(max(1, repeat)):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", kind, str(files), str(workers)],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"{kind} ({files} files, {workers} workers) failed:\n{completed.stderr}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    # The fastest run is the least disturbed by whatever else the machine was doing.
+    return min(runs, key=lambda run: run["elapsed_s"])
+
+
+def compare(name: str, result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        current, reference = result.get(metric), baseline.get(metric)
+        if current is None or not reference:
+            continue
+        if higher_is_better and current < reference * (1 - tolerance):
+            regressions.append(f"{name}: {metric} {current} < baseline {reference}")
+        elif not higher_is_better and current > reference * (1 + tolerance):
+            regressions.append(f"{name}: {metric} {current} > baseline {reference}")
+    return regressions
+
+
+def _format(value: Any) -> str:
+    return "-" if value is None else str(value)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PPT 2 PDF conversion benchmarks")
+    parser.add_argument("--sizes", default="1,10,100,1000", help="comma-separated file counts (default: 1,10,100,1000)")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts for workflow runs (default: 1,2,4)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario, the fastest is kept (default: 3)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default: 0.25)")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    parser.add_argument("--child", nargs=3, metavar=("KIND", "FILES", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        kind, files, workers = args.child
+        print(json.dumps(run_child(kind, int(files), int(workers))))
+        return 0
+
+    sizes = [int(value) for value in args.sizes.split(",") if value.strip()]
+    worker_counts = [int(value) for value in args.workers.split(",") if value.strip()]
+
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle).get("results", {})
+
+    print(f"{'scenario':<22} {'elapsed s':>10} {'files/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'RSS MB':>8}")
+    results: Dict[str, Dict[str, Any]] = {}
+    regressions: List[str] = []
+    for name, kind, files, workers in scenario_matrix(sizes, worker_counts):
+        result = run_scenario(kind, files, workers, args.repeat)
+        results[name] = result
+        print(
+            f"{name:<22} {_format(result['elapsed_s']):>10} {_format(result['throughput']):>9} "
+            f"{_format(result['p50_ms']):>9} {_format(result['p95_ms']):>9} {_format(result['peak_rss_mb']):>8}",
+            flush=True,
+        )
+        if name in baseline:
+            regressions.extend(compare(name, result, baseline[name], args.tolerance))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "fake_delay_s": float(os.environ.get("FAKE_SOFFICE_DELAY", "0.005")),
+        },
+        "results": results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("No baseline to compare against; run with --update-baseline to create one.")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Startup-time benchmark with a regression budget.
+
+Each probe runs in a fresh interpreter and is measured from process launch,
+so interpreter start-up is included. Probes:
+
+- ``services``: ``from services import ConversionService``
+- ``cli``: ``import ppt2pdf.cli`` (the headless entry point)
+- ``window``: build the GUI as ``main.py`` does and return once the window has
+  been drawn (skipped when customtkinter or a display is unavailable)
+
+After the ``services`` and ``cli`` probes the script also checks that the lazily
+imported heavy modules (pypdf, PIL, comtypes) have not been loaded. Exits 1
+when a probe exceeds its budget or a heavy module is imported eagerly.
+
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --services-budget-ms 150 --repeat 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("pypdf", "PIL", "comtypes")
+
+_REPORT = """
+import json, sys, time
+print(json.dumps({{"ready": time.time(), "eager": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+PROBES = {
+    "services": "from services import ConversionService\n",
+    "cli": "import ppt2pdf.cli\n",
+    "window": (
+        "import customtkinter as ctk\n"
+        "from views import MainView, setup_windows_taskbar\n"
+        "from controllers import AppController\n"
+        "setup_windows_taskbar()\n"
+        "root = ctk.CTk()\n"
+        "view = MainView(root)\n"
+        "controller = AppController(view)\n"
+        "root.update()\n"
+    ),
+}
+# The window probe finishes with tear-down after the timestamp is reported.
+_WINDOW_TEARDOWN = "controller.shutdown()\nroot.destroy()\n"
+
+
+def run_probe(name: str) -> Optional[Dict[str, Any]]:
+    code = PROBES[name] + _REPORT.format(lazy=LAZY_MODULES)
+    if name == "window":
+        code += _WINDOW_TEARDOWN
+    env = dict(os.environ)
+    env["PPT2PDF_CACHE"] = "0"
+    launched = time.time()
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if completed.returncode != 0:
+        return None
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"ms": (report["ready"] - launched) * 1000, "eager": report["eager"]}
+
+
+def measure(name: str, repeat: int) -> Optional[Dict[str, Any]]:
+    runs: List[Dict[str, Any]] = []
+    for _ in range(max(1, repeat)):
+        result = run_probe(name)
+        if result is None:
+            return None
+        runs.append(result)
+    times = sorted(run["ms"] for run in runs)
+    return {
+        "best_ms": round(times[0], 1),
+        "median_ms": round(times[len(times) // 2], 1),
+        "eager": sorted({module for run in runs for module in run["eager"]}),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PPT 2 PDF startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per probe (default: 5)")
+    parser.add_argument("--services-budget-ms", type=float, default=250, help="budget for importing services (default: 250)")
+    parser.add_argument("--cli-budget-ms", type=float, default=300, help="budget for importing the CLI (default: 300)")
+    parser.add_argument("--window-budget-ms", type=float, default=1500, help="budget for time-to-window (default: 1500)")
+    args = parser.parse_args(argv)
+
+    budgets = {
+        "services": args.services_budget_ms,
+        "cli": args.cli_budget_ms,
+        "window": args.window_budget_ms,
+    }
+    failures: List[str] = []
+    print(f"{'probe':<10} {'best ms':>9} {'median ms':>10} {'budget ms':>10}")
+    for name, budget in budgets.items():
+        result = measure(name, args.repeat)
+        if result is None:
+            if name == "window":
+                print(f"{name:<10} {'skipped (no customtkinter or display)':>31}")
+                continue
+            failures.append(f"{name}: probe failed to run")
+            continue
+
+        # Budgets are checked against the median so a single slow run does not fail the check.
+        print(f"{name:<10} {result['best_ms']:>9} {result['median_ms']:>10} {budget:>10}")
+        if result["median_ms"] > budget:
+            failures.append(f"{name}: {result['median_ms']} ms exceeds the {budget} ms budget")
+        if result["eager"] and name != "window":
+            failures.append(f"{name}: imports {', '.join(result['eager'])} at startup")
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print("\nStartup is within budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import threading
 from typing import Any, Dict, List, Optional
 
 from views import MainView
@@ -19,6 +20,7 @@ class AppController:
         self.view = view
         self.service = ConversionService()
         self.task_manager = TaskManager()
+        self.task_manager.scheduler.on_change = lambda: self.view.schedule(self._refresh_list)
         self._display_to_internal_task_name: Dict[str, str] = {}
 
         self.file_actions = FileActions(
@@ -30,30 +32,68 @@ class AppController:
         self.conversion_actions = ConversionActions(
             view=self.view,
             find_task=self._find_task,
-            is_task_cancelled=self.task_manager.is_task_cancelled,
             refresh_list=self._refresh_list,
             finalize_successful_task=self._finalize_successful_task,
             open_path=open_path,
+            create_service=self._create_task_service,
         )
 
         self.task_manager.create_task()
         self._bind_callbacks()
         self._refresh_list()
-        self._check_backend_availability()
+        self._start_backend_detection()
 
-    def _check_backend_availability(self) -> None:
+    def _create_task_service(self) -> ConversionService:
+        return ConversionService(
+            backend_support=self.service.backend_support,
+            scheduler=self.task_manager.scheduler,
+        )
+
+    def shutdown(self) -> None:
+        self.service.shutdown()
+
+    def _start_backend_detection(self, redetect: bool = False) -> None:
+        self.view.set_convert_available(False)
+        self.view.set_redetect_enabled(False)
+        self._refresh_list()
+        self.view.update_status("Detecting backends…", 0)
+        thread = threading.Thread(target=self._detect_backends, args=(redetect,), name="ppt2pdf-detect", daemon=True)
+        thread.start()
+
+    def redetect_backends(self) -> None:
+        if self.task_manager.running_count() > 0:
+            self.view.show_warning("Tasks Running", "Wait for running conversions to finish before re-detecting backends.")
+            return
+        self._start_backend_detection(redetect=True)
+
+    def _detect_backends(self, redetect: bool) -> None:
+        # Probing can take seconds (COM start-up on Windows), so it runs off the UI thread.
+        # Conversions share this BackendSupport and wait for the same probe.
         try:
+            if redetect:
+                self.service.backend_support.redetect()
             available = self.service.get_available_backends()
-            if not available:
-                self.view.show_warning("No Backend Found", self.service.get_install_message())
-                self.view.update_status("No backend found - install required app", 0)
-                return
-
-            backend_name = self.service.get_active_backend_name()
-            self.view.update_status(f"Ready - Backend: {backend_name}", 0)
+            backend_name = self.service.get_active_backend_name() if available else ""
         except Exception as exc:
-            self.view.show_warning("Backend Check Failed", str(exc))
-            self.view.update_status("Backend check failed", 0)
+            self.view.schedule(self._on_backend_detection_failed, str(exc))
+            return
+        self.view.schedule(self._on_backends_detected, backend_name)
+
+    def _on_backends_detected(self, backend_name: str) -> None:
+        self.view.set_redetect_enabled(True)
+        if not backend_name:
+            self.view.show_warning("No Backend Found", self.service.get_install_message())
+            self.view.update_status("No backend found - install required app", 0)
+            return
+
+        self.view.set_convert_available(True)
+        self._refresh_list()
+        self.view.update_status(f"Ready - Backend: {backend_name}", 0)
+
+    def _on_backend_detection_failed(self, message: str) -> None:
+        self.view.set_redetect_enabled(True)
+        self.view.show_warning("Backend Check Failed", message)
+        self.view.update_status("Backend check failed", 0)
 
     def _bind_callbacks(self) -> None:
         self.view.on_add_files = self.add_files
@@ -69,6 +109,7 @@ class AppController:
         self.view.on_new_task_tab = self.create_task_tab
         self.view.on_close_task_tab = self.close_task_tab
         self.view.on_switch_task_tab = self.switch_task_tab
+        self.view.on_redetect_backends = self.redetect_backends
 
     def _find_task(self, task_name: str) -> Optional[Dict[str, Any]]:
         return self.task_manager.find_task(task_name)
@@ -110,7 +151,7 @@ class AppController:
             )
             if not confirmed:
                 return
-            task["cancel_requested"] = True
+            self.task_manager.cancel_task(internal_name)
             task["status"] = "Stopping backend process..."
         elif has_files:
             confirmed = self.view.ask_confirm(
@@ -171,7 +212,8 @@ class AppController:
 
     def _update_queue_display(self) -> None:
         running = self.task_manager.running_count()
-        self.view.schedule(self.view.update_queue_status, running)
+        waiting = self.task_manager.waiting_unit_count()
+        self.view.schedule(self.view.update_queue_status, running, waiting)
 
     def _refresh_list(self) -> None:
         task = self._active_task()
@@ -194,6 +236,9 @@ class AppController:
         self.view.update_file_list(files)
         if task:
             status_prefix = "Running" if task["is_converting"] else "Idle"
+            queue_position = self.task_manager.queue_position(task["name"]) if task["is_converting"] else 0
+            if queue_position:
+                status_prefix = f"{status_prefix} (queue #{queue_position})"
             self.view.update_status(f"[{task['name']}] {status_prefix} - {task['status']}", task["progress"])
             self.view.update_task_actions(bool(task["is_converting"]))
         self._update_queue_display()
@@ -1,6 +1,8 @@
+import os
 import threading
 from typing import Any, Callable, Dict, List, Optional
 
+from services.cancellation import CancellationToken
 from services.converter_service import ConversionService
 from services.conversion_types import ConversionCancelledError
 from views import MainView
@@ -11,17 +13,17 @@ class ConversionActions:
         self,
         view: MainView,
         find_task: Callable[[str], Optional[Dict[str, Any]]],
-        is_task_cancelled: Callable[[str], bool],
         refresh_list: Callable[[], None],
         finalize_successful_task: Callable[[str], None],
         open_path: Callable[[str], None],
+        create_service: Callable[[], ConversionService],
     ) -> None:
         self._view = view
         self._find_task = find_task
-        self._is_task_cancelled = is_task_cancelled
         self._refresh_list = refresh_list
         self._finalize_successful_task = finalize_successful_task
         self._open_path = open_path
+        self._create_service = create_service
 
     def _start_task_conversion(self, task: Dict[str, Any], task_type: str, output_path: str) -> None:
         if task["is_converting"]:
@@ -30,6 +32,7 @@ class ConversionActions:
 
         task["is_converting"] = True
         task["cancel_requested"] = False
+        task["cancel_token"] = CancellationToken()
         task["status"] = "Starting conversion..."
         task["progress"] = 0.0
         self._refresh_list()
@@ -39,6 +42,7 @@ class ConversionActions:
             "type": task_type,
             "files": list(task["files"]),
             "output_path": output_path,
+            "cancel_token": task["cancel_token"],
         }
         thread = threading.Thread(target=self._do_conversion_task, args=(task_payload,), daemon=True)
         thread.start()
@@ -87,9 +91,19 @@ class ConversionActions:
             return
 
         task["cancel_requested"] = True
+        task["cancel_token"].cancel()
         task["status"] = "Stopping backend process..."
         self._refresh_list()
 
+    def _skipped_note(self, service: ConversionService) -> str:
+        rejected = service.rejected_inputs()
+        if not rejected:
+            return ""
+        lines = [f"{os.path.basename(path)}: {reason}" for path, reason in rejected[:10]]
+        if len(rejected) > 10:
+            lines.append(f"...and {len(rejected) - 10} more")
+        return f"\n\nSkipped {len(rejected)} file(s):\n" + "\n".join(lines)
+
     def _do_conversion_task(self, task: Dict[str, Any]) -> None:
         try:
             task_name = task.get("task_name", "Task")
@@ -97,7 +111,7 @@ class ConversionActions:
             if task_state is None:
                 return
 
-            service = ConversionService()
+            service = self._create_service()
 
             def progress_callback(message: str, progress: float) -> None:
                 state = self._find_task(task_name)
@@ -115,7 +129,8 @@ class ConversionActions:
                     output_path=task["output_path"],
                     progress_callback=progress_callback,
                     delete_temp=self._view.delete_temp_files,
-                    is_cancelled=lambda: self._is_task_cancelled(task_name),
+                    is_cancelled=task["cancel_token"],
+                    owner=task_name,
                 )
 
                 task_state["status"] = "Completed"
@@ -124,7 +139,7 @@ class ConversionActions:
                 self._view.schedule(
                     self._view.show_info,
                     "Success",
-                    f"{task_name}: PDF created successfully!\n{task['output_path']}",
+                    f"{task_name}: PDF created successfully!\n{task['output_path']}{self._skipped_note(service)}",
                 )
 
                 if self._view.open_after_conversion:
@@ -136,7 +151,8 @@ class ConversionActions:
                     ppt_files=task["files"],
                     output_dir=task["output_path"],
                     progress_callback=progress_callback,
-                    is_cancelled=lambda: self._is_task_cancelled(task_name),
+                    is_cancelled=task["cancel_token"],
+                    owner=task_name,
                 )
 
                 task_state["status"] = "Completed"
@@ -145,7 +161,8 @@ class ConversionActions:
                 self._view.schedule(
                     self._view.show_info,
                     "Done",
-                    f"{task_name}: {len(created_files)} PDF files created in:\n{task['output_path']}",
+                    f"{task_name}: {len(created_files)} PDF files created in:\n{task['output_path']}"
+                    f"{self._skipped_note(service)}",
                 )
 
                 if self._view.open_after_conversion:
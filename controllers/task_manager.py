@@ -1,11 +1,20 @@
 from typing import Any, Dict, List, Optional
 
+from services.cancellation import CancellationToken
+from services.conversion_scheduler import ConversionScheduler
+from services.conversion_settings import ConversionSettings
+
 
 class TaskManager:
-    def __init__(self) -> None:
+    def __init__(self, scheduler: Optional[ConversionScheduler] = None) -> None:
         self._tasks: List[Dict[str, Any]] = []
         self._active_task_name: Optional[str] = None
         self._task_counter = 0
+        self._scheduler = scheduler or ConversionScheduler(ConversionSettings.from_env().max_concurrency)
+
+    @property
+    def scheduler(self) -> ConversionScheduler:
+        return self._scheduler
 
     @property
     def tasks(self) -> List[Dict[str, Any]]:
@@ -27,6 +36,7 @@ class TaskManager:
             "files": [],
             "is_converting": False,
             "cancel_requested": False,
+            "cancel_token": CancellationToken(),
             "status": "Ready - Add files to get started",
             "progress": 0.0,
         }
@@ -58,13 +68,14 @@ class TaskManager:
         clean = "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in value.strip())
         return clean.strip("_") or "task"
 
-    def is_task_cancelled(self, task_name: str) -> bool:
+    def cancel_task(self, task_name: str) -> None:
         task = self.find_task(task_name)
-        if not task:
-            return True
-        return bool(task["cancel_requested"])
+        if task:
+            task["cancel_requested"] = True
+            task["cancel_token"].cancel()
 
     def remove_task(self, task_name: str) -> None:
+        self.cancel_task(task_name)
         self._tasks = [task for task in self._tasks if task["name"] != task_name]
         if not self._tasks:
             self.create_task()
@@ -77,3 +88,9 @@ class TaskManager:
 
     def running_count(self) -> int:
         return sum(1 for task in self._tasks if task["is_converting"])
+
+    def queue_position(self, task_name: str) -> int:
+        return self._scheduler.queue_position(task_name)
+
+    def waiting_unit_count(self) -> int:
+        return self._scheduler.waiting_count()
@@ -12,9 +12,12 @@ def main():
     root = ctk.CTk()
     
     view = MainView(root)
-    AppController(view)
+    controller = AppController(view)
     
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        controller.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Headless command-line interface for the converter (no tkinter required)."""
@@ -0,0 +1,348 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from services.backend_support import BackendSupport
+from services.cancellation import CancellationToken
+from services.conversion_cache import ConversionCache
+from services.conversion_settings import ConversionSettings
+from services.conversion_types import ConversionBackend, ConversionCancelledError, backend_display_name
+from services.converter_service import ConversionService
+from services.tracing import get_tracer
+
+_emit_lock = threading.Lock()
+
+
+def _format_mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def run_prune(args: argparse.Namespace) -> int:
+    settings = ConversionSettings.from_env()
+    cache_dir = args.cache_dir or settings.cache_dir
+    max_bytes = settings.cache_max_bytes if args.max_mb is None else args.max_mb * 1024 * 1024
+
+    cache = ConversionCache(cache_dir, index_dir=settings.cache_index_dir, max_bytes=max_bytes)
+    removed, freed = cache.prune(max_bytes)
+    print(f"Removed {removed} cached PDF(s), freed {_format_mb(freed)}; cache is now {_format_mb(cache.total_size())}")
+    return 0
+
+
+def run_backends(args: argparse.Namespace) -> int:
+    support = BackendSupport()
+    try:
+        if args.redetect:
+            support.redetect()
+        records = support.detection_records()
+    except RuntimeError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+
+    for value, record in records.items():
+        name = backend_display_name(ConversionBackend(value))
+        if not record.get("available"):
+            print(f"{name}: not found")
+            continue
+        capabilities = ", ".join(key for key, enabled in sorted(record.get("capabilities", {}).items()) if enabled)
+        details = [record.get("path") or "", record.get("version") or "unknown version"]
+        if capabilities:
+            details.append(capabilities)
+        print(f"{name}: {'; '.join(detail for detail in details if detail)}")
+    if not support.get_available_backends():
+        print(support.get_install_message(), file=sys.stderr)
+        return 1
+    return 0
+
+
+def emit(event: str, **fields: Any) -> None:
+    line = json.dumps({"event": event, **fields}, ensure_ascii=False)
+    with _emit_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def _settings_from_args(args: argparse.Namespace) -> ConversionSettings:
+    settings = ConversionSettings.from_env()
+    if args.workers is not None:
+        settings.max_workers = max(1, args.workers)
+    if args.no_cache:
+        settings.cache_enabled = False
+    if args.cache_dir:
+        settings.cache_dir = args.cache_dir
+    if args.trace:
+        settings.trace_path = args.trace
+    if args.metrics_file:
+        settings.metrics_file = args.metrics_file
+    return settings
+
+
+def _backend_support_from_args(args: argparse.Namespace) -> BackendSupport:
+    preferred = ConversionBackend(args.backend) if args.backend else None
+    return BackendSupport(preferred_backend=preferred)
+
+
+def _create_service(args: argparse.Namespace) -> ConversionService:
+    return ConversionService(backend_support=_backend_support_from_args(args), settings=_settings_from_args(args))
+
+
+def _run_conversion(args: argparse.Namespace, mode: str, convert: Callable[..., Any]) -> int:
+    missing = [path for path in args.inputs if not os.path.isfile(path)]
+    if missing:
+        emit("error", message=f"Input file(s) not found: {', '.join(missing)}")
+        return 2
+
+    service = _create_service(args)
+    cancel_token = CancellationToken()
+    outcome: dict = {}
+    started = time.perf_counter()
+
+    def on_progress(message: str, progress: float) -> None:
+        emit("progress", message=message, progress=round(progress, 2))
+
+    def run() -> None:
+        try:
+            outcome["result"] = convert(service, on_progress, cancel_token)
+        except BaseException as exc:
+            outcome["error"] = exc
+
+    try:
+        emit(
+            "start",
+            mode=mode,
+            inputs=len(args.inputs),
+            backend=service.get_active_backend_name(),
+            workers=service.max_workers(),
+        )
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        # Join in short steps so Ctrl+C reaches the main thread and cancels cleanly.
+        while worker.is_alive():
+            try:
+                worker.join(timeout=0.2)
+            except KeyboardInterrupt:
+                cancel_token.cancel()
+    except RuntimeError as exc:
+        emit("error", message=str(exc))
+        return 1
+    finally:
+        service.shutdown()
+
+    hits, misses = service.cache_stats()
+    summary = {
+        "mode": mode,
+        "inputs": len(args.inputs),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "cache_hits": hits,
+        "cache_misses": misses,
+        "skipped": [{"input": path, "reason": reason} for path, reason in service.rejected_inputs()],
+    }
+    tracer = get_tracer()
+    if tracer is not None:
+        summary["trace"] = tracer.export()
+    error = outcome.get("error")
+    if isinstance(error, ConversionCancelledError) or (error is None and cancel_token.is_cancelled()):
+        emit("cancelled", **summary)
+        return 130
+    if error is not None:
+        emit("error", message=str(error), **summary)
+        return 1
+
+    result = outcome.get("result")
+    outputs = result if isinstance(result, list) else [os.path.abspath(args.output)]
+    emit("done", outputs=outputs, **summary)
+    return 0
+
+
+def run_merge(args: argparse.Namespace) -> int:
+    output_path = os.path.abspath(args.output)
+
+    def convert(service: ConversionService, on_progress: Callable[[str, float], None], is_cancelled: Callable[[], bool]) -> None:
+        service.convert_and_merge(
+            [os.path.abspath(path) for path in args.inputs],
+            output_path,
+            progress_callback=on_progress,
+            is_cancelled=is_cancelled,
+            allow_skipped=args.skip_invalid,
+        )
+
+    return _run_conversion(args, "merge", convert)
+
+
+def run_separate(args: argparse.Namespace) -> int:
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    def convert(service: ConversionService, on_progress: Callable[[str, float], None], is_cancelled: Callable[[], bool]) -> List[str]:
+        return service.convert_separate(
+            [os.path.abspath(path) for path in args.inputs],
+            output_dir,
+            progress_callback=on_progress,
+            is_cancelled=is_cancelled,
+        )
+
+    return _run_conversion(args, "separate", convert)
+
+
+def run_watch(args: argparse.Namespace) -> int:
+    from services.watch_folder import FolderWatcher
+
+    if not os.path.isdir(args.source):
+        emit("error", message=f"Source folder not found: {args.source}")
+        return 2
+
+    service = _create_service(args)
+    cancel_token = CancellationToken()
+    watcher = FolderWatcher(
+        service,
+        args.source,
+        args.output_dir,
+        poll_interval=args.interval,
+        settle_time=args.settle,
+        on_event=emit,
+    )
+    try:
+        if args.once:
+            # Two scans settle_time apart: the first records sizes, the second converts stable files.
+            watcher.scan()
+            time.sleep(args.settle)
+            watcher.process_once()
+        else:
+            watcher.run(cancel_token)
+    except KeyboardInterrupt:
+        cancel_token.cancel()
+    except RuntimeError as exc:
+        emit("error", message=str(exc))
+        return 1
+    finally:
+        service.shutdown()
+    return 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    from services.job_queue import JobQueue
+
+    from .server import ConversionServer, is_loopback_host
+
+    if not args.allow_remote and not is_loopback_host(args.host):
+        emit("error", message=f"Refusing to listen on {args.host or 'all interfaces'} without --allow-remote")
+        return 2
+    allowed_roots = [os.path.abspath(root) for root in args.allow_path or []]
+    missing = [root for root in allowed_roots if not os.path.isdir(root)]
+    if missing:
+        emit("error", message=f"--allow-path folder not found: {', '.join(missing)}")
+        return 2
+
+    jobs = JobQueue(
+        backend_support=_backend_support_from_args(args),
+        settings=_settings_from_args(args),
+        max_running=args.max_running,
+        max_pending=args.max_pending,
+    )
+    max_upload = args.max_upload_mb * 1024 * 1024 if args.max_upload_mb > 0 else None
+    server = ConversionServer(
+        (args.host, args.port),
+        jobs,
+        max_upload_bytes=max_upload,
+        quiet=args.quiet,
+        allowed_roots=allowed_roots,
+        allow_remote=args.allow_remote,
+    )
+    emit("listening", host=args.host, port=server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.shutdown()
+    return 0
+
+
+def _add_conversion_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--workers", type=int, help="parallel conversions (default: PPT2PDF_WORKERS or half the CPU cores)")
+    parser.add_argument(
+        "--backend",
+        choices=[backend.value for backend in ConversionBackend],
+        help="converter backend (default: best one detected)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the PDF cache")
+    parser.add_argument("--cache-dir", help="cache directory (default: PPT2PDF_CACHE_DIR or the user cache)")
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome/Perfetto trace of the run to PATH (default: PPT2PDF_TRACE)")
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="keep Prometheus text-format metrics in PATH, rewritten every PPT2PDF_METRICS_INTERVAL seconds",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m ppt2pdf", description="PPT 2 PDF command-line tools")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    merge = subparsers.add_parser("merge", help="convert presentations and merge them into one PDF")
+    merge.add_argument("inputs", nargs="+", help="presentation files, in output order")
+    _add_conversion_arguments(merge)
+    merge.add_argument("-o", "--output", required=True, help="merged PDF path")
+    merge.add_argument(
+        "--skip-invalid",
+        action="store_true",
+        help="merge the decks that can be converted and list the rest as skipped (default: fail if any deck cannot be converted)",
+    )
+    merge.set_defaults(handler=run_merge)
+
+    separate = subparsers.add_parser("separate", help="convert each presentation to its own PDF")
+    separate.add_argument("inputs", nargs="+", help="presentation files")
+    _add_conversion_arguments(separate)
+    separate.add_argument("-o", "--output-dir", required=True, help="directory for the converted PDFs")
+    separate.set_defaults(handler=run_separate)
+
+    watch = subparsers.add_parser("watch", help="convert new or changed presentations in a folder as they appear")
+    watch.add_argument("source", help="folder to watch (searched recursively)")
+    _add_conversion_arguments(watch)
+    watch.add_argument("-o", "--output-dir", required=True, help="mirror directory for the converted PDFs")
+    watch.add_argument("--interval", type=float, default=2.0, help="seconds between folder scans (default: 2)")
+    watch.add_argument("--settle", type=float, default=2.0, help="seconds a file must stay unchanged before conversion (default: 2)")
+    watch.add_argument("--once", action="store_true", help="convert pending files once and exit")
+    watch.set_defaults(handler=run_watch)
+
+    serve = subparsers.add_parser("serve", help="run a local HTTP job service")
+    _add_conversion_arguments(serve)
+    serve.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on, 0 picks a free one (default: 8765)")
+    serve.add_argument("--max-running", type=int, default=2, help="jobs converting at the same time (default: 2)")
+    serve.add_argument("--max-pending", type=int, default=16, help="queued jobs before new ones get HTTP 429 (default: 16)")
+    serve.add_argument("--max-upload-mb", type=int, default=512, help="largest accepted upload, 0 for no limit (default: 512)")
+    serve.add_argument("--quiet", action="store_true", help="do not log requests to stderr")
+    serve.add_argument(
+        "--allow-path",
+        action="append",
+        metavar="FOLDER",
+        help="accept {\"paths\": [...]} jobs for files under FOLDER (repeatable; default: uploads only)",
+    )
+    serve.add_argument(
+        "--allow-remote",
+        action="store_true",
+        help="allow binding to a non-loopback --host and requests addressed to any host name",
+    )
+    serve.set_defaults(handler=run_serve)
+
+    backends = subparsers.add_parser("backends", help="list detected converter backends")
+    backends.add_argument("--redetect", action="store_true", help="discard cached detection results and probe again")
+    backends.set_defaults(handler=run_backends)
+
+    prune = subparsers.add_parser("prune", help="evict least recently used cache entries down to the size cap")
+    prune.add_argument("--cache-dir", help="cache directory (default: PPT2PDF_CACHE_DIR or the user cache)")
+    prune.add_argument("--max-mb", type=int, help="size cap in MB, 0 empties the cache (default: PPT2PDF_CACHE_MAX_MB)")
+    prune.set_defaults(handler=run_prune)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv if argv is not None else sys.argv[1:])
+    return args.handler(args)
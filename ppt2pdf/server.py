@@ -0,0 +1,300 @@
+import ipaddress
+import json
+import os
+import re
+import shutil
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from services.job_queue import JOB_MODES, ConversionJob, JobQueue, JobQueueFullError
+from services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from services.metrics import render_metrics
+
+CHUNK_SIZE = 1024 * 1024
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]{32})(/result|/cancel)?$")
+
+
+# True for localhost names and loopback addresses, with or without a port.
+def is_loopback_host(host: str) -> bool:
+    host = host.strip().lower()
+    if host.startswith("["):
+        host = host[1:].split("]", 1)[0]
+    elif host.count(":") == 1:
+        host = host.split(":", 1)[0]
+    if host == "localhost" or host.endswith(".localhost"):
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class PathNotAllowedError(PermissionError):
+    pass
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ppt2pdf"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def jobs(self) -> JobQueue:
+        return self.server.jobs  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not getattr(self.server, "quiet", False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status: HTTPStatus, payload: Any, close: bool = False) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            # The request body was not read, so the connection cannot be reused.
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    # A web page can point its own host name at 127.0.0.1 (DNS rebinding) and
+    # then talk to this service with its name in the Host header, so a local
+    # service only answers requests addressed to a loopback name.
+    def _host_allowed(self) -> bool:
+        if getattr(self.server, "allow_remote", False):
+            return True
+        host = self.headers.get("Host")
+        if host is None or is_loopback_host(host):
+            return True
+        self._send_json(HTTPStatus.FORBIDDEN, {"error": "Host header must name a loopback address"}, close=True)
+        return False
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _content_length(self) -> int:
+        try:
+            return max(0, int(self.headers.get("Content-Length", "0")))
+        except ValueError:
+            return 0
+
+    def _discard_body(self) -> None:
+        remaining = self._content_length()
+        while remaining > 0:
+            chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+    def _match_job(self) -> Tuple[Optional[str], str]:
+        match = _JOB_PATH.match(urlparse(self.path).path)
+        if not match:
+            return None, ""
+        return match.group(1), match.group(2) or ""
+
+    def do_GET(self) -> None:
+        if not self._host_allowed():
+            return
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok", **self.jobs.stats()})
+            return
+        if path == "/metrics":
+            body = render_metrics().encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        job_id, action = self._match_job()
+        job = self.jobs.get(job_id) if job_id else None
+        if job is None or action == "/cancel":
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+            return
+        if not action:
+            self._send_json(HTTPStatus.OK, job.to_dict())
+            return
+
+        if job.status != "done" or not job.result_path:
+            self._send_error(HTTPStatus.CONFLICT, f"Job is {job.status}, no result available")
+            return
+        self._send_file(job.result_path)
+
+    def _send_file(self, path: str) -> None:
+        try:
+            handle = open(path, "rb")
+        except OSError:
+            self._send_error(HTTPStatus.GONE, "Result is no longer available")
+            return
+
+        # Results are copied to the socket in chunks and never loaded whole.
+        with handle:
+            size = os.fstat(handle.fileno()).st_size
+            is_zip = path.endswith(".zip")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/zip" if is_zip else "application/pdf")
+            self.send_header("Content-Length", str(size))
+            self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+            self.end_headers()
+            shutil.copyfileobj(handle, self.wfile, CHUNK_SIZE)
+
+    def do_POST(self) -> None:
+        if not self._host_allowed():
+            return
+        parsed = urlparse(self.path)
+        if parsed.path == "/jobs":
+            self._submit(parse_qs(parsed.query))
+            return
+
+        job_id, action = self._match_job()
+        self._discard_body()
+        if job_id and action == "/cancel":
+            self._cancel(job_id)
+            return
+        self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+
+    def do_DELETE(self) -> None:
+        if not self._host_allowed():
+            return
+        job_id, action = self._match_job()
+        self._discard_body()
+        if job_id and not action:
+            self._cancel(job_id)
+            return
+        self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+
+    def _cancel(self, job_id: str) -> None:
+        job = self.jobs.cancel(job_id)
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+
+    def _submit(self, query: dict) -> None:
+        self._body_pending = False
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        try:
+            if content_type == "application/json":
+                job = self._submit_paths()
+            else:
+                job = self._submit_upload(query)
+        except JobQueueFullError as exc:
+            self.send_response(HTTPStatus.TOO_MANY_REQUESTS)
+            body = json.dumps({"error": str(exc)}).encode("utf-8")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Retry-After", "5")
+            if self._body_pending:
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        except PathNotAllowedError as exc:
+            self._send_error(HTTPStatus.FORBIDDEN, str(exc))
+            return
+        except ValueError as exc:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(exc))
+            return
+        if job is None:
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+
+    def _submit_paths(self) -> ConversionJob:
+        length = self._content_length()
+        if length > CHUNK_SIZE:
+            self._discard_body()
+            raise ValueError("JSON request body is too large")
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ValueError("Request body is not valid JSON")
+
+        paths = payload.get("paths") if isinstance(payload, dict) else None
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            raise ValueError('Expected {"paths": [...], "mode": "merge" | "separate"}')
+        mode = payload.get("mode", "merge")
+        allow_skipped = payload.get("skip_invalid", False)
+        if not isinstance(allow_skipped, bool):
+            raise ValueError('"skip_invalid" must be true or false')
+        return self.jobs.submit(mode, [self._allowed_path(path) for path in paths], allow_skipped=allow_skipped)
+
+    # Path submissions read files on this machine and serve them back, so they
+    # are off unless the server was given roots to allow, and symlinks are
+    # resolved before the check so they cannot point outside those roots.
+    def _allowed_path(self, path: str) -> str:
+        roots: List[str] = getattr(self.server, "allowed_roots", [])
+        if not roots:
+            raise PathNotAllowedError("Path submissions are disabled; upload the file or start the server with --allow-path")
+        resolved = os.path.realpath(path)
+        for root in roots:
+            try:
+                if os.path.commonpath([resolved, root]) == root:
+                    return resolved
+            except ValueError:
+                continue
+        raise PathNotAllowedError(f"Path is outside the allowed folders: {path}")
+
+    def _submit_upload(self, query: dict) -> Optional[ConversionJob]:
+        mode = query.get("mode", ["merge"])[0]
+        filename = os.path.basename(query.get("filename", [""])[0])
+        if mode not in JOB_MODES:
+            self._discard_body()
+            raise ValueError(f"Unknown mode: {mode}")
+        if not filename.lower().endswith((".ppt", ".pptx")):
+            self._discard_body()
+            raise ValueError("Upload needs a ?filename=<name>.pptx (or .ppt) query parameter")
+
+        length = self._content_length()
+        max_upload = getattr(self.server, "max_upload_bytes", None)
+        if length <= 0:
+            raise ValueError("Upload body is empty (Content-Length required)")
+        if max_upload is not None and length > max_upload:
+            self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Upload is too large"}, close=True)
+            return None
+        # Checked before the body is read so a full queue does not make the
+        # client send (and this server store) an upload it will refuse.
+        if self.jobs.is_full():
+            self._body_pending = True
+            raise JobQueueFullError("Too many queued jobs, try again later")
+
+        work_dir = self.jobs.create_work_dir()
+        input_path = os.path.join(work_dir, filename)
+        try:
+            # Streamed to disk in chunks so large decks never sit in memory.
+            remaining = length
+            with open(input_path, "wb") as handle:
+                while remaining > 0:
+                    chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ValueError("Upload ended before Content-Length bytes were received")
+                    handle.write(chunk)
+                    remaining -= len(chunk)
+            return self.jobs.submit(mode, [input_path], work_dir=work_dir)
+        except BaseException:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+
+
+class ConversionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        jobs: JobQueue,
+        max_upload_bytes: Optional[int] = None,
+        quiet: bool = False,
+        allowed_roots: Optional[List[str]] = None,
+        allow_remote: bool = False,
+    ) -> None:
+        super().__init__(address, ConversionRequestHandler)
+        self.jobs = jobs
+        self.max_upload_bytes = max_upload_bytes
+        self.quiet = quiet
+        self.allowed_roots = [os.path.realpath(root) for root in allowed_roots or []]
+        self.allow_remote = allow_remote
@@ -1,4 +1,21 @@
-from .converter_service import ConversionService
-from .conversion_types import ConversionBackend
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .converter_service import ConversionService
+    from .conversion_types import ConversionBackend
 
 __all__ = ['ConversionService', 'ConversionBackend']
+
+
+# Submodules are imported on first attribute access so that importing a single
+# module such as services.conversion_settings does not load the whole package.
+def __getattr__(name: str) -> Any:
+    if name == 'ConversionService':
+        from .converter_service import ConversionService
+
+        return ConversionService
+    if name == 'ConversionBackend':
+        from .conversion_types import ConversionBackend
+
+        return ConversionBackend
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,8 +2,11 @@ import os
 import shutil
 import sys
 import tempfile
-from typing import Callable, Optional
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
+from .backend_profiles import profile_argument
 from .backend_support import BackendSupport
 from .conversion_runtime import (
     powerpoint_worker,
@@ -11,12 +14,111 @@ from .conversion_runtime import (
     run_cancellable_worker,
     wps_worker,
 )
-from .conversion_types import ConversionBackend, ConversionCancelledError
+from .conversion_types import ConversionBackend, ConversionCancelledError, ConversionTimeoutError
+from .metrics import (
+    CONVERSION_SECONDS,
+    CONVERSION_TIMEOUTS,
+    CONVERSIONS_CANCELLED,
+    CONVERSIONS_FAILED,
+    CONVERSIONS_STARTED,
+    CONVERSIONS_SUCCEEDED,
+    PDF_BYTES,
+)
+from .timeout_policy import TimeoutPolicy
+from .tracing import record_span, span
 
 
 class BackendConverters:
-    def __init__(self, backend_support: Optional[BackendSupport] = None) -> None:
+    BATCH_SIZE = 20
+
+    def __init__(
+        self,
+        backend_support: Optional[BackendSupport] = None,
+        timeout_policy: Optional[TimeoutPolicy] = None,
+        stall_timeout: Optional[float] = None,
+    ) -> None:
         self._backend_support = backend_support or BackendSupport()
+        self._timeout_policy = timeout_policy or TimeoutPolicy()
+        # Keynote is driven through osascript, which sits idle while Keynote
+        # works in its own process, so only the headless suites are watched.
+        self._stall_timeout = stall_timeout
+
+    def batch_limit(self) -> int:
+        backend = self._backend_support.get_active_backend()
+        if self._backend_support.get_capabilities(backend).get("batch") and not self._backend_support.uses_libreoffice_listener():
+            return self.BATCH_SIZE
+        return 1
+
+    def max_parallelism(self) -> Optional[int]:
+        # PowerPoint, WPS and Keynote are single-instance desktop apps driven over
+        # COM/AppleScript; only the headless office suites can run side by side.
+        backend = self._backend_support.get_active_backend()
+        if self._backend_support.get_capabilities(backend).get("parallel"):
+            return None
+        return 1
+
+    def plan_batches(self, input_paths: List[str], workers: int = 1) -> List[List[int]]:
+        limit = self.batch_limit()
+        if input_paths and workers > 1:
+            limit = min(limit, -(-len(input_paths) // workers))
+        if limit <= 1:
+            return [[index] for index in range(len(input_paths))]
+
+        # soffice names its output after the input stem, so two inputs with the
+        # same stem (e.g. a/slides.pptx and b/slides.pptx) must not share a run.
+        batches: List[List[int]] = []
+        batch_stems: List[Set[str]] = []
+        first_open = 0
+        for index, input_path in enumerate(input_paths):
+            stem = os.path.splitext(os.path.basename(input_path))[0].casefold()
+            placed = False
+            for batch_index in range(first_open, len(batches)):
+                if len(batches[batch_index]) < limit and stem not in batch_stems[batch_index]:
+                    batches[batch_index].append(index)
+                    batch_stems[batch_index].add(stem)
+                    placed = True
+                    break
+            if not placed:
+                batches.append([index])
+                batch_stems.append({stem})
+
+            while first_open < len(batches) and len(batches[first_open]) >= limit:
+                first_open += 1
+
+        return batches
+
+    def convert_batch(
+        self,
+        jobs: List[Tuple[str, str]],
+        on_file_started: Optional[Callable[[int], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        if len(jobs) == 1 or self._backend_support.get_active_backend() != ConversionBackend.LIBREOFFICE:
+            for index, (input_path, output_path) in enumerate(jobs):
+                if is_cancelled and is_cancelled():
+                    raise ConversionCancelledError("Conversion cancelled")
+                if on_file_started:
+                    on_file_started(index)
+                self.convert(input_path, output_path, is_cancelled=is_cancelled)
+            return
+
+        history_key = self._history_key(ConversionBackend.LIBREOFFICE)
+        units = self._timeout_policy.work_units([input_path for input_path, _ in jobs])
+        started = time.perf_counter()
+        with self._measured(ConversionBackend.LIBREOFFICE, [output_path for _, output_path in jobs]) as outcome:
+            self._convert_batch_with_libreoffice(
+                jobs,
+                on_file_started=on_file_started,
+                is_cancelled=is_cancelled,
+                produced=outcome.setdefault("produced", []),
+                timeout=self._timeout_policy.timeout_for(history_key, units),
+            )
+        self._timeout_policy.record(history_key, units, time.perf_counter() - started)
+
+    # Timing history is kept per backend version, so runs of another install
+    # (or of the benchmarks' fake soffice) never shape this one's timeouts.
+    def _history_key(self, backend: ConversionBackend) -> str:
+        return f"{backend.value}:{self._backend_support.get_backend_version(backend)}"
 
     def convert(
         self,
@@ -25,21 +127,74 @@ class BackendConverters:
         is_cancelled: Optional[Callable[[], bool]] = None,
     ) -> None:
         backend = self._backend_support.get_active_backend()
+        history_key = self._history_key(backend)
+        units = self._timeout_policy.work_units([input_path])
+        timeout = self._timeout_policy.timeout_for(history_key, units)
+        started = time.perf_counter()
+        with self._measured(backend, [output_path]), span("convert", backend=backend.value, file=os.path.basename(input_path)):
+            self._convert_with(backend, input_path, output_path, is_cancelled, timeout)
+        self._timeout_policy.record(history_key, units, time.perf_counter() - started)
 
+    # Records started/succeeded/failed/cancelled counts, run time and output size
+    # for one backend run. A batch that fails part-way reports the outputs it did
+    # produce through outcome["produced"].
+    @contextmanager
+    def _measured(self, backend: ConversionBackend, output_paths: List[str]) -> Iterator[Dict[str, List[str]]]:
+        label = backend.value
+        total = len(output_paths)
+        outcome: Dict[str, List[str]] = {}
+        CONVERSIONS_STARTED.inc(total, backend=label)
+        started = time.perf_counter()
+        try:
+            yield outcome
+        except ConversionCancelledError:
+            CONVERSIONS_CANCELLED.inc(total, backend=label)
+            raise
+        except BaseException as exc:
+            if isinstance(exc, ConversionTimeoutError):
+                CONVERSION_TIMEOUTS.inc(backend=label)
+            produced = outcome.get("produced", [])
+            self._count_produced(label, produced)
+            CONVERSIONS_FAILED.inc(total - len(produced), backend=label)
+            raise
+        finally:
+            CONVERSION_SECONDS.observe(time.perf_counter() - started, backend=label)
+        self._count_produced(label, outcome.get("produced", output_paths))
+
+    def _count_produced(self, label: str, output_paths: List[str]) -> None:
+        if not output_paths:
+            return
+        CONVERSIONS_SUCCEEDED.inc(len(output_paths), backend=label)
+        produced_bytes = 0
+        for output_path in output_paths:
+            try:
+                produced_bytes += os.path.getsize(output_path)
+            except OSError:
+                pass
+        PDF_BYTES.inc(produced_bytes, stage="converted")
+
+    def _convert_with(
+        self,
+        backend: ConversionBackend,
+        input_path: str,
+        output_path: str,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        timeout: float = 180,
+    ) -> None:
         if backend == ConversionBackend.POWERPOINT:
-            self._convert_with_powerpoint(input_path, output_path, is_cancelled=is_cancelled)
+            self._convert_with_powerpoint(input_path, output_path, is_cancelled=is_cancelled, timeout=timeout)
             return
         if backend == ConversionBackend.WPS:
-            self._convert_with_wps(input_path, output_path, is_cancelled=is_cancelled)
+            self._convert_with_wps(input_path, output_path, is_cancelled=is_cancelled, timeout=timeout)
             return
         if backend == ConversionBackend.LIBREOFFICE:
-            self._convert_with_libreoffice(input_path, output_path, is_cancelled=is_cancelled)
+            self._convert_with_libreoffice(input_path, output_path, is_cancelled=is_cancelled, timeout=timeout)
             return
         if backend == ConversionBackend.ONLYOFFICE:
-            self._convert_with_onlyoffice(input_path, output_path, is_cancelled=is_cancelled)
+            self._convert_with_onlyoffice(input_path, output_path, is_cancelled=is_cancelled, timeout=timeout)
             return
         if backend == ConversionBackend.KEYNOTE:
-            self._convert_with_keynote(input_path, output_path, is_cancelled=is_cancelled)
+            self._convert_with_keynote(input_path, output_path, is_cancelled=is_cancelled, timeout=timeout)
             return
 
         raise RuntimeError(f"Unsupported backend: {backend.value}")
@@ -49,24 +204,26 @@ class BackendConverters:
         input_path: str,
         output_path: str,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        timeout: float = 180,
     ) -> None:
         if sys.platform != "win32":
             raise RuntimeError("PowerPoint backend is only supported on Windows")
-        run_cancellable_worker(powerpoint_worker, input_path, output_path, is_cancelled=is_cancelled)
+        run_cancellable_worker(powerpoint_worker, input_path, output_path, is_cancelled=is_cancelled, timeout=timeout)
 
     def _convert_with_wps(
         self,
         input_path: str,
         output_path: str,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        timeout: float = 180,
     ) -> None:
         if sys.platform != "win32":
             raise RuntimeError("WPS backend is only supported on Windows")
 
         try:
-            run_cancellable_worker(wps_worker, input_path, output_path, is_cancelled=is_cancelled)
+            run_cancellable_worker(wps_worker, input_path, output_path, is_cancelled=is_cancelled, timeout=timeout)
             return
-        except ConversionCancelledError:
+        except (ConversionCancelledError, ConversionTimeoutError):
             raise
         except Exception:
             pass
@@ -81,17 +238,44 @@ class BackendConverters:
         input_path: str,
         output_path: str,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        timeout: float = 180,
     ) -> None:
         soffice = self._backend_support.find_libreoffice()
         if not soffice:
             raise RuntimeError("LibreOffice executable not found")
 
+        with self._backend_support.lease_profile() as profile_dir:
+            listener = self._backend_support.get_libreoffice_listener(profile_dir)
+            if listener is not None:
+                listener.convert(
+                    input_path,
+                    os.path.abspath(output_path),
+                    timeout=timeout,
+                    is_cancelled=is_cancelled,
+                    stall_timeout=self._stall_timeout,
+                )
+                return
+
+            self._convert_with_soffice_cli(soffice, profile_dir, input_path, output_path, is_cancelled, timeout)
+
+    def _convert_with_soffice_cli(
+        self,
+        soffice: str,
+        profile_dir: str,
+        input_path: str,
+        output_path: str,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        timeout: float = 180,
+    ) -> None:
         input_abs = os.path.abspath(input_path)
         with tempfile.TemporaryDirectory() as temp_out_dir:
             cmd = [
                 soffice,
                 "--headless",
                 "--invisible",
+                "--norestore",
+                "--nolockcheck",
+                profile_argument(profile_dir),
                 "--convert-to",
                 "pdf",
                 "--outdir",
@@ -99,7 +283,12 @@ class BackendConverters:
                 input_abs,
             ]
 
-            result = run_cancellable_subprocess(cmd, timeout=180, is_cancelled=is_cancelled)
+            result = run_cancellable_subprocess(
+                cmd,
+                timeout=timeout,
+                is_cancelled=is_cancelled,
+                stall_timeout=self._stall_timeout,
+            )
             if result.returncode != 0:
                 raise RuntimeError(f"LibreOffice conversion failed: {result.stderr.strip() or result.stdout.strip()}")
 
@@ -108,6 +297,100 @@ class BackendConverters:
             if not os.path.exists(generated_pdf):
                 raise RuntimeError("LibreOffice conversion finished but no PDF was generated")
 
+            self._move_output(generated_pdf, output_path)
+
+    def _convert_batch_with_libreoffice(
+        self,
+        jobs: List[Tuple[str, str]],
+        on_file_started: Optional[Callable[[int], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        produced: Optional[List[str]] = None,
+        timeout: float = 180,
+    ) -> None:
+        soffice = self._backend_support.find_libreoffice()
+        if not soffice:
+            raise RuntimeError("LibreOffice executable not found")
+
+        input_paths = [os.path.abspath(input_path) for input_path, _ in jobs]
+        stems = [os.path.splitext(os.path.basename(path))[0] for path in input_paths]
+        if len({stem.casefold() for stem in stems}) != len(stems):
+            raise RuntimeError("LibreOffice batch contains inputs with the same file name")
+
+        index_by_input: Dict[str, int] = {path: index for index, path in enumerate(input_paths)}
+        started_at: Dict[int, float] = {}
+
+        def on_stdout_line(line: str) -> None:
+            # soffice announces each file as "convert <input> as a ... -> <output> using filter : ..."
+            if not line.startswith("convert "):
+                return
+            for path, index in index_by_input.items():
+                if line.startswith(f"convert {path} "):
+                    started_at[index] = time.perf_counter()
+                    if on_file_started:
+                        on_file_started(index)
+                    return
+
+        with self._backend_support.lease_profile() as profile_dir, tempfile.TemporaryDirectory() as temp_out_dir:
+            cmd = [
+                soffice,
+                "--headless",
+                "--invisible",
+                "--norestore",
+                "--nolockcheck",
+                profile_argument(profile_dir),
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                temp_out_dir,
+                *input_paths,
+            ]
+
+            with span("convert", backend=ConversionBackend.LIBREOFFICE.value, files=len(jobs)):
+                batch_started = time.perf_counter()
+                result = run_cancellable_subprocess(
+                    cmd,
+                    timeout=timeout,
+                    is_cancelled=is_cancelled,
+                    on_stdout_line=on_stdout_line,
+                    stall_timeout=self._stall_timeout,
+                )
+                self._record_batch_files(input_paths, started_at, batch_started, time.perf_counter())
+            if result.returncode != 0:
+                raise RuntimeError(f"LibreOffice conversion failed: {result.stderr.strip() or result.stdout.strip()}")
+
+            missing: List[str] = []
+            for (input_path, output_path), stem in zip(jobs, stems):
+                generated_pdf = os.path.join(temp_out_dir, f"{stem}.pdf")
+                if not os.path.exists(generated_pdf):
+                    missing.append(os.path.basename(input_path))
+                    continue
+                self._move_output(generated_pdf, output_path)
+                if produced is not None:
+                    produced.append(output_path)
+
+            if missing:
+                raise RuntimeError(
+                    "LibreOffice conversion finished but no PDF was generated for: " + ", ".join(missing)
+                )
+
+    def _record_batch_files(
+        self,
+        input_paths: List[str],
+        started_at: Dict[int, float],
+        batch_started: float,
+        batch_finished: float,
+    ) -> None:
+        # soffice works through a batch one file at a time, so each file runs from
+        # its own "convert" line to the next one (or to the end of the process).
+        ordered = sorted(started_at.items(), key=lambda item: item[1])
+        if ordered:
+            record_span("startup", batch_started, ordered[0][1], program="soffice")
+        for position, (index, start) in enumerate(ordered):
+            end = ordered[position + 1][1] if position + 1 < len(ordered) else batch_finished
+            record_span("convert", start, end, file=os.path.basename(input_paths[index]), batched=True)
+
+    def _move_output(self, generated_pdf: str, output_path: str) -> None:
+        with span("move", file=os.path.basename(output_path)):
             shutil.move(generated_pdf, os.path.abspath(output_path))
 
     def _convert_with_onlyoffice(
@@ -115,15 +398,17 @@ class BackendConverters:
         input_path: str,
         output_path: str,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        timeout: float = 180,
     ) -> None:
         exe = self._backend_support.find_onlyoffice()
         if not exe:
             raise RuntimeError("ONLYOFFICE executable not found")
 
-        with tempfile.TemporaryDirectory() as temp_out_dir:
+        with self._backend_support.lease_profile() as profile_dir, tempfile.TemporaryDirectory() as temp_out_dir:
             cmd = [
                 exe,
                 "--headless",
+                profile_argument(profile_dir),
                 "--convert-to",
                 "pdf",
                 "--outdir",
@@ -131,7 +416,12 @@ class BackendConverters:
                 os.path.abspath(input_path),
             ]
 
-            result = run_cancellable_subprocess(cmd, timeout=180, is_cancelled=is_cancelled)
+            result = run_cancellable_subprocess(
+                cmd,
+                timeout=timeout,
+                is_cancelled=is_cancelled,
+                stall_timeout=self._stall_timeout,
+            )
             if result.returncode != 0:
                 raise RuntimeError(
                     "ONLYOFFICE conversion failed. Desktop Editors CLI may not support conversion on this build. "
@@ -143,13 +433,14 @@ class BackendConverters:
             if not os.path.exists(generated_pdf):
                 raise RuntimeError("ONLYOFFICE conversion finished but no PDF was generated")
 
-            shutil.move(generated_pdf, os.path.abspath(output_path))
+            self._move_output(generated_pdf, output_path)
 
     def _convert_with_keynote(
         self,
         input_path: str,
         output_path: str,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        timeout: float = 180,
     ) -> None:
         if sys.platform != "darwin":
             raise RuntimeError("Keynote backend is only supported on macOS")
@@ -166,7 +457,7 @@ class BackendConverters:
 
         result = run_cancellable_subprocess(
             ["osascript", "-e", "\n".join(script)],
-            timeout=180,
+            timeout=timeout,
             is_cancelled=is_cancelled,
         )
         if result.returncode != 0:
@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .conversion_settings import default_cache_root, env_flag
+
+BackendRecords = Dict[str, Dict[str, Any]]
+
+CACHE_FORMAT = 1
+
+
+def default_detection_cache_path() -> Optional[str]:
+    if not env_flag("PPT2PDF_DETECTION_CACHE", True):
+        return None
+    return os.environ.get("PPT2PDF_DETECTION_CACHE_FILE") or os.path.join(default_cache_root(), "backends.json")
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+# Installing or upgrading an office suite changes PATH, the mtime of a PATH
+# directory or install location, or the mtime of the executable itself, so
+# any of those invalidates persisted detection results.
+def detection_fingerprint(candidate_paths: List[str], records: BackendRecords) -> Dict[str, Any]:
+    path_env = os.environ.get("PATH", "")
+    watched = [entry for entry in path_env.split(os.pathsep) if entry]
+    watched.extend(candidate_paths)
+    watched.extend(os.path.dirname(path) for path in candidate_paths)
+    watched.extend(record["path"] for record in records.values() if record.get("path"))
+    return {
+        "platform": sys.platform,
+        "path": path_env,
+        "mtimes": {path: _mtime_ns(path) for path in sorted(set(watched))},
+    }
+
+
+# Detection results are shared by every BackendSupport in the process and
+# persisted between launches. Probing runs at most once at a time: callers that
+# arrive while a probe is in flight wait for its result.
+class BackendDetection:
+    def __init__(self, cache_path: Optional[str] = None) -> None:
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._records: Optional[BackendRecords] = None
+        self._flight: Optional[Dict[str, Any]] = None
+        self._generation = 0
+
+    def is_complete(self) -> bool:
+        return self._records is not None
+
+    def records(self, probe: Callable[[], BackendRecords], candidate_paths: Callable[[], List[str]]) -> BackendRecords:
+        with self._lock:
+            if self._records is not None:
+                return self._records
+            flight = self._flight
+            is_owner = flight is None
+            if flight is None:
+                flight = {"done": threading.Event(), "records": None, "error": None, "generation": self._generation}
+                self._flight = flight
+
+        if not is_owner:
+            flight["done"].wait()
+        else:
+            try:
+                paths = candidate_paths()
+                records = self._load(paths)
+                if records is None:
+                    records = probe()
+                    self._save(records, paths)
+                flight["records"] = records
+            except Exception as exc:
+                flight["error"] = exc
+            with self._lock:
+                if self._flight is flight:
+                    self._flight = None
+                if flight["records"] is not None and flight["generation"] == self._generation:
+                    self._records = flight["records"]
+            flight["done"].set()
+
+        if flight["error"] is not None:
+            raise RuntimeError(f"Backend detection failed: {flight['error']}")
+        return flight["records"]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._records = None
+            self._flight = None
+            self._generation += 1
+        if self.cache_path:
+            try:
+                os.remove(self.cache_path)
+            except OSError:
+                pass
+
+    def _load(self, candidate_paths: List[str]) -> Optional[BackendRecords]:
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT:
+            return None
+        records = data.get("backends")
+        if not isinstance(records, dict):
+            return None
+        if data.get("fingerprint") != detection_fingerprint(candidate_paths, records):
+            return None
+        return records
+
+    def _save(self, records: BackendRecords, candidate_paths: List[str]) -> None:
+        if not self.cache_path:
+            return
+        payload = {
+            "format": CACHE_FORMAT,
+            "fingerprint": detection_fingerprint(candidate_paths, records),
+            "backends": records,
+        }
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".backends-", suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(payload, handle, indent=1)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+_shared: Dict[Optional[str], BackendDetection] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_backend_detection(cache_path: Optional[str] = None) -> BackendDetection:
+    path = cache_path if cache_path is not None else default_detection_cache_path()
+    with _shared_lock:
+        detection = _shared.get(path)
+        if detection is None:
+            detection = BackendDetection(path)
+            _shared[path] = detection
+        return detection
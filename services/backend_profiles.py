@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .process_tree import is_pid_alive, iter_process_arguments, kill_process_tree
+
+
+def profile_argument(profile_dir: str) -> str:
+    return f"-env:UserInstallation={Path(profile_dir).as_uri()}"
+
+
+def _profile_owner(name: str) -> Optional[int]:
+    owner, separator, _ = name.partition("-")
+    if not separator or not owner.isdigit():
+        return None
+    return int(owner)
+
+
+# Profiles are named "<owner pid>-<n>". A profile whose owner is gone belongs
+# to a run that crashed or was killed: backend processes still using it are
+# killed (with their process group) and the directory is removed.
+def reap_orphaned_profiles(root_dir: str) -> Tuple[int, int]:
+    try:
+        names = os.listdir(root_dir)
+    except OSError:
+        return 0, 0
+
+    stale: Dict[str, str] = {}
+    for name in names:
+        owner = _profile_owner(name)
+        if owner is None or owner == os.getpid() or is_pid_alive(owner):
+            continue
+        path = os.path.join(root_dir, name)
+        stale[profile_argument(path)] = path
+    if not stale:
+        return 0, 0
+
+    killed: Set[int] = set()
+    for pid, arguments in iter_process_arguments():
+        if any(argument in stale for argument in arguments):
+            kill_process_tree(pid)
+            killed.add(pid)
+
+    removed = 0
+    for path in stale.values():
+        shutil.rmtree(path, ignore_errors=True)
+        if not os.path.exists(path):
+            removed += 1
+    return len(killed), removed
+
+
+_swept_roots: Set[str] = set()
+_sweep_lock = threading.Lock()
+
+
+def sweep_orphaned_profiles(root_dir: str) -> None:
+    with _sweep_lock:
+        if root_dir in _swept_roots:
+            return
+        _swept_roots.add(root_dir)
+    threading.Thread(
+        target=reap_orphaned_profiles,
+        args=(root_dir,),
+        name="ppt2pdf-profile-sweep",
+        daemon=True,
+    ).start()
+
+
+# LibreOffice/ONLYOFFICE lock their user profile, so every concurrent backend
+# instance needs its own. Released profiles are reused to keep them warm.
+class ProfilePool:
+    def __init__(self, root_dir: Optional[str] = None) -> None:
+        self._root_dir = root_dir or os.path.join(tempfile.gettempdir(), "ppt2pdf-profiles")
+        self._idle: List[str] = []
+        self._created: List[str] = []
+        self._counter = 0
+        self._lock = threading.Lock()
+        sweep_orphaned_profiles(self._root_dir)
+
+    @property
+    def root_dir(self) -> str:
+        return self._root_dir
+
+    def _create_profile(self) -> str:
+        self._counter += 1
+        path = os.path.join(self._root_dir, f"{os.getpid()}-{self._counter}")
+        os.makedirs(path, exist_ok=True)
+        self._created.append(path)
+        return path
+
+    def acquire(self) -> str:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            return self._create_profile()
+
+    def release(self, profile_dir: str) -> None:
+        with self._lock:
+            if profile_dir in self._created and profile_dir not in self._idle:
+                self._idle.append(profile_dir)
+
+    @contextmanager
+    def lease(self) -> Iterator[str]:
+        profile_dir = self.acquire()
+        try:
+            yield profile_dir
+        finally:
+            self.release(profile_dir)
+
+    def cleanup(self) -> None:
+        with self._lock:
+            created = list(self._created)
+            self._created = []
+            self._idle = []
+
+        for path in created:
+            shutil.rmtree(path, ignore_errors=True)
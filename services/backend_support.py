@@ -1,9 +1,17 @@
+import atexit
 import os
 import shutil
+import subprocess
 import sys
-from typing import List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 
+from .backend_detection import BackendDetection, BackendRecords, shared_backend_detection
+from .backend_profiles import ProfilePool
 from .conversion_types import ConversionBackend, backend_display_name
+from .libreoffice_listener import LibreOfficeListener
+from .tracing import span
 
 
 class BackendSupport:
@@ -42,10 +50,19 @@ class BackendSupport:
         ],
     }
 
-    def __init__(self):
-        self._detected_backend: Optional[ConversionBackend] = None
-        self._libreoffice_path: Optional[str] = None
-        self._onlyoffice_path: Optional[str] = None
+    KEYNOTE_PATH = "/Applications/Keynote.app"
+
+    def __init__(
+        self,
+        preferred_backend: Optional[ConversionBackend] = None,
+        detection: Optional[BackendDetection] = None,
+    ):
+        self._preferred_backend = preferred_backend
+        self._detection = detection or shared_backend_detection()
+        self._libreoffice_listeners: Dict[str, LibreOfficeListener] = {}
+        self._listener_lock = threading.Lock()
+        self._profiles = ProfilePool()
+        self._shutdown_registered = False
 
     def _platform_key(self) -> str:
         if sys.platform == "win32":
@@ -67,59 +84,163 @@ class BackendSupport:
 
         return None
 
-    def _check_powerpoint_available(self) -> bool:
-        if sys.platform != "win32":
-            return False
-
+    def _check_com_available(self, prog_id: str) -> bool:
         try:
+            import comtypes
             import comtypes.client
-
-            app = comtypes.client.CreateObject("Powerpoint.Application")
-            app.Quit()
-            return True
         except Exception:
             return False
 
-    def _check_wps_available(self) -> bool:
-        if sys.platform != "win32":
+        # Detection may run on a background thread, which needs its own COM apartment.
+        try:
+            comtypes.CoInitialize()
+        except OSError:
             return False
-
         try:
-            import comtypes.client
-
-            app = comtypes.client.CreateObject("KWPP.Application")
+            app = comtypes.client.CreateObject(prog_id)
             app.Quit()
             return True
         except Exception:
-            pass
+            return False
+        finally:
+            comtypes.CoUninitialize()
 
-        return self._find_executable(["wpp", "wps"], self.WPS_PATHS) is not None
+    def _check_powerpoint_available(self) -> bool:
+        if sys.platform != "win32":
+            return False
+        return self._check_com_available("Powerpoint.Application")
 
-    def find_libreoffice(self) -> Optional[str]:
-        if self._libreoffice_path:
-            return self._libreoffice_path
+    def _check_wps_available(self) -> bool:
+        if sys.platform != "win32":
+            return False
+        return self._check_com_available("KWPP.Application")
 
+    def _search_libreoffice(self) -> Optional[str]:
         platform_paths = self.LIBREOFFICE_PATHS.get(self._platform_key(), [])
-        self._libreoffice_path = self._find_executable(["soffice", "libreoffice"], platform_paths)
-        return self._libreoffice_path
-
-    def find_onlyoffice(self) -> Optional[str]:
-        if self._onlyoffice_path:
-            return self._onlyoffice_path
+        return self._find_executable(["soffice", "libreoffice"], platform_paths)
 
+    def _search_onlyoffice(self) -> Optional[str]:
         platform_paths = self.ONLYOFFICE_PATHS.get(self._platform_key(), [])
-        self._onlyoffice_path = self._find_executable(
+        return self._find_executable(
             ["onlyoffice-desktopeditors", "desktopeditors", "DesktopEditors"],
             platform_paths,
         )
-        return self._onlyoffice_path
+
+    def find_libreoffice(self) -> Optional[str]:
+        return self._backend_record(ConversionBackend.LIBREOFFICE).get("path")
+
+    def find_onlyoffice(self) -> Optional[str]:
+        return self._backend_record(ConversionBackend.ONLYOFFICE).get("path")
+
+    @contextmanager
+    def lease_profile(self) -> Iterator[str]:
+        with self._profiles.lease() as profile_dir:
+            yield profile_dir
+
+    def _register_shutdown(self) -> None:
+        if not self._shutdown_registered:
+            self._shutdown_registered = True
+            atexit.register(self.shutdown)
+
+    def get_libreoffice_listener(self, profile_dir: str) -> Optional[LibreOfficeListener]:
+        if not LibreOfficeListener.is_supported():
+            return None
+
+        soffice = self.find_libreoffice()
+        if not soffice:
+            return None
+
+        with self._listener_lock:
+            listener = self._libreoffice_listeners.get(profile_dir)
+            if listener is None:
+                listener = LibreOfficeListener(soffice, profile_dir)
+                self._libreoffice_listeners[profile_dir] = listener
+                self._register_shutdown()
+            return listener
+
+    def uses_libreoffice_listener(self) -> bool:
+        return LibreOfficeListener.is_supported() and self.find_libreoffice() is not None
+
+    def shutdown(self) -> None:
+        with self._listener_lock:
+            listeners = list(self._libreoffice_listeners.values())
+            self._libreoffice_listeners = {}
+
+        for listener in listeners:
+            listener.shutdown()
+        self._profiles.cleanup()
 
     def _check_keynote_available(self) -> bool:
         if sys.platform != "darwin":
             return False
-        return os.path.isdir("/Applications/Keynote.app")
+        return os.path.isdir(self.KEYNOTE_PATH)
 
-    def get_available_backends(self) -> List[ConversionBackend]:
+    # Returns the detection record for one backend: whether it is usable, the
+    # executable it runs (if any) and what the converters may do with it.
+    def _probe_backend(self, backend: ConversionBackend) -> Dict[str, Any]:
+        path: Optional[str] = None
+        capabilities: Dict[str, bool] = {}
+        if backend == ConversionBackend.POWERPOINT:
+            capabilities["com"] = self._check_powerpoint_available()
+            available = capabilities["com"]
+        elif backend == ConversionBackend.WPS:
+            capabilities["com"] = self._check_wps_available()
+            path = self._find_executable(["wpp", "wps"], self.WPS_PATHS) if sys.platform == "win32" else None
+            available = capabilities["com"] or path is not None
+        elif backend == ConversionBackend.LIBREOFFICE:
+            path = self._search_libreoffice()
+            available = path is not None
+            capabilities.update(parallel=True, batch=True)
+        elif backend == ConversionBackend.ONLYOFFICE:
+            path = self._search_onlyoffice()
+            available = path is not None
+            capabilities.update(parallel=True)
+        elif backend == ConversionBackend.KEYNOTE:
+            available = self._check_keynote_available()
+            path = self.KEYNOTE_PATH if available else None
+        else:
+            available = False
+        return {"available": available, "path": path, "version": None, "capabilities": capabilities}
+
+    def _probe_backends(self) -> BackendRecords:
+        records: BackendRecords = {}
+        for backend in self._platform_backends():
+            with span("detect", backend=backend.value) as args:
+                record = self._probe_backend(backend)
+                args["available"] = record["available"]
+            if record["available"]:
+                with span("detect", backend=backend.value, stage="version"):
+                    record["version"] = self._detect_backend_version(backend, record["path"])
+            records[backend.value] = record
+        return records
+
+    def _candidate_paths(self) -> List[str]:
+        platform_key = self._platform_key()
+        paths = list(self.LIBREOFFICE_PATHS.get(platform_key, []))
+        paths.extend(self.ONLYOFFICE_PATHS.get(platform_key, []))
+        if platform_key == "win32":
+            paths.extend(self.WPS_PATHS)
+        if platform_key == "darwin":
+            paths.append(self.KEYNOTE_PATH)
+        return paths
+
+    def detection_records(self) -> BackendRecords:
+        return self._detection.records(self._probe_backends, self._candidate_paths)
+
+    def _backend_record(self, backend: ConversionBackend) -> Dict[str, Any]:
+        return self.detection_records().get(backend.value) or {"available": False, "capabilities": {}}
+
+    def is_detection_complete(self) -> bool:
+        return self._detection.is_complete()
+
+    def redetect(self) -> List[ConversionBackend]:
+        self._detection.invalidate()
+        return self.get_available_backends()
+
+    def get_capabilities(self, backend: ConversionBackend) -> Dict[str, bool]:
+        return dict(self._backend_record(backend).get("capabilities") or {})
+
+    def _platform_backends(self) -> List[ConversionBackend]:
         if sys.platform == "win32":
             ordered = [
                 ConversionBackend.POWERPOINT,
@@ -139,20 +260,15 @@ class BackendSupport:
                 ConversionBackend.ONLYOFFICE,
             ]
 
-        available: List[ConversionBackend] = []
-        for backend in ordered:
-            if backend == ConversionBackend.POWERPOINT and self._check_powerpoint_available():
-                available.append(backend)
-            elif backend == ConversionBackend.WPS and self._check_wps_available():
-                available.append(backend)
-            elif backend == ConversionBackend.LIBREOFFICE and self.find_libreoffice():
-                available.append(backend)
-            elif backend == ConversionBackend.ONLYOFFICE and self.find_onlyoffice():
-                available.append(backend)
-            elif backend == ConversionBackend.KEYNOTE and self._check_keynote_available():
-                available.append(backend)
-
-        return available
+        return ordered
+
+    def get_available_backends(self) -> List[ConversionBackend]:
+        records = self.detection_records()
+        return [
+            backend
+            for backend in self._platform_backends()
+            if records.get(backend.value, {}).get("available")
+        ]
 
     def get_install_message(self) -> str:
         if sys.platform == "win32":
@@ -168,15 +284,68 @@ class BackendSupport:
         )
 
     def get_active_backend(self) -> ConversionBackend:
-        if self._detected_backend:
-            return self._detected_backend
+        if self._preferred_backend is not None:
+            if not self._backend_record(self._preferred_backend).get("available"):
+                raise RuntimeError(f"{backend_display_name(self._preferred_backend)} is not available on this system.")
+            return self._preferred_backend
 
         available = self.get_available_backends()
         if not available:
             raise RuntimeError(self.get_install_message())
-
-        self._detected_backend = available[0]
-        return self._detected_backend
+        return available[0]
 
     def get_active_backend_name(self) -> str:
         return backend_display_name(self.get_active_backend())
+
+    def _registry_version(self, prog_id: str) -> str:
+        try:
+            import winreg
+
+            with winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, f"{prog_id}\\CurVer") as key:
+                return str(winreg.QueryValue(key, None))
+        except Exception:
+            return "unknown"
+
+    def _file_version(self, path: Optional[str]) -> str:
+        if not path:
+            return "unknown"
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return "unknown"
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def _detect_backend_version(self, backend: ConversionBackend, path: Optional[str]) -> str:
+        if backend == ConversionBackend.LIBREOFFICE:
+            soffice = path
+            if not soffice:
+                return "unknown"
+            try:
+                result = subprocess.run([soffice, "--version"], capture_output=True, text=True, timeout=30)
+                version = result.stdout.strip()
+            except (OSError, subprocess.SubprocessError):
+                version = ""
+            return version or self._file_version(soffice)
+        if backend == ConversionBackend.ONLYOFFICE:
+            return self._file_version(path)
+        if backend == ConversionBackend.POWERPOINT:
+            return self._registry_version("PowerPoint.Application")
+        if backend == ConversionBackend.WPS:
+            return self._registry_version("KWPP.Application")
+        if backend == ConversionBackend.KEYNOTE:
+            try:
+                import plistlib
+
+                with open(os.path.join(self.KEYNOTE_PATH, "Contents", "Info.plist"), "rb") as handle:
+                    info = plistlib.load(handle)
+                return str(info.get("CFBundleShortVersionString", "unknown"))
+            except Exception:
+                return "unknown"
+        return "unknown"
+
+    def get_backend_version(self, backend: ConversionBackend) -> str:
+        return self._backend_record(backend).get("version") or "unknown"
+
+    def get_backend_identity(self) -> str:
+        backend = self.get_active_backend()
+        return f"{backend.value}:{self.get_backend_version(backend)}"
@@ -0,0 +1,152 @@
+import threading
+import time
+import weakref
+from typing import Any, Callable, List, Optional, Tuple
+
+
+# A cancel flag that waiters can block on. Calling the token returns whether it
+# is cancelled, so it can be passed anywhere an ``is_cancelled`` callable is
+# accepted. Callbacks run once, on the thread that calls cancel(), and must not
+# block.
+class CancellationToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    def __call__(self) -> bool:
+        return self._event.is_set()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+
+# Plain ``is_cancelled`` callables cannot signal anyone, so they are checked by
+# one shared thread for the whole process instead of a loop per waiter. The
+# thread only runs while such callables are being watched.
+class _CallablePoller:
+    INTERVAL = 0.1
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._watched: List[Tuple[Callable[[], bool], "weakref.ReferenceType[CancellationToken]"]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, is_cancelled: Callable[[], bool], token: CancellationToken) -> None:
+        with self._lock:
+            self._watched.append((is_cancelled, weakref.ref(token)))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ppt2pdf-cancel-poller", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                watched = list(self._watched)
+            remaining = []
+            for is_cancelled, token_ref in watched:
+                token = token_ref()
+                if token is None or token.is_cancelled():
+                    continue
+                try:
+                    cancelled = bool(is_cancelled())
+                except Exception:
+                    cancelled = False
+                if cancelled:
+                    token.cancel()
+                else:
+                    remaining.append((is_cancelled, token_ref))
+            with self._lock:
+                added = self._watched[len(watched):]
+                self._watched = remaining + added
+                if not self._watched:
+                    self._thread = None
+                    return
+            time.sleep(self.INTERVAL)
+
+
+_poller = _CallablePoller()
+
+
+def cancellation_token(is_cancelled: Optional[Callable[[], bool]]) -> Optional[CancellationToken]:
+    if is_cancelled is None or isinstance(is_cancelled, CancellationToken):
+        return is_cancelled
+    token = CancellationToken()
+    if is_cancelled():
+        token.cancel()
+    else:
+        _poller.watch(is_cancelled, token)
+    return token
+
+
+def child_token(parent: Optional[Callable[[], bool]]) -> Tuple[CancellationToken, Callable[[], None]]:
+    token = CancellationToken()
+    parent_token = cancellation_token(parent)
+    if parent_token is None:
+        return token, lambda: None
+    return token, parent_token.add_callback(token.cancel)
+
+
+# Blocks until ``wait`` returns (e.g. a process or thread finishing), the token
+# is cancelled, or ``timeout`` passes, without polling. ``wait`` runs on a
+# helper thread that stays parked in the blocking call. Returns "done",
+# "cancelled" or "timeout".
+def wait_for(
+    wait: Callable[[], Any],
+    token: Optional[CancellationToken] = None,
+    timeout: Optional[float] = None,
+) -> str:
+    finished = threading.Event()
+    wake = threading.Event()
+
+    def run_wait() -> None:
+        try:
+            wait()
+        finally:
+            finished.set()
+            wake.set()
+
+    threading.Thread(target=run_wait, name="ppt2pdf-wait", daemon=True).start()
+    remove_callback = token.add_callback(wake.set) if token is not None else None
+    try:
+        wake.wait(timeout)
+    finally:
+        if remove_callback is not None:
+            remove_callback()
+
+    if token is not None and token.is_cancelled():
+        return "cancelled"
+    if finished.is_set():
+        return "done"
+    return "timeout"
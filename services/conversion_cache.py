@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .file_lock import FileLock
+
+CACHE_FORMAT = "1"
+HASH_CHUNK_SIZE = 1024 * 1024
+STALE_TEMP_SECONDS = 3600
+EVICTION_TARGET_RATIO = 0.9
+# Eviction after a store gives up after this long if another process holds the
+# cache lock; the next store (or ppt2pdf cache prune) catches up.
+STORE_PRUNE_LOCK_TIMEOUT = 5.0
+SIZE_HINT_NAME = "size.json"
+
+
+class ConversionCache:
+    _instances: Dict[str, "ConversionCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str, index_dir: Optional[str] = None, max_bytes: Optional[int] = None) -> None:
+        self._cache_dir = os.path.abspath(cache_dir)
+        self._entries_dir = os.path.join(self._cache_dir, "entries")
+        self._lock_path = os.path.join(self._cache_dir, "cache.lock")
+        # Running total of entry bytes, shared by every process using the cache:
+        # stores add to it and prune resets it, so no store has to scan entries.
+        self._size_hint_path = os.path.join(self._cache_dir, SIZE_HINT_NAME)
+        # The stat index maps local paths to content hashes, so it never lives in
+        # the (possibly shared) cache directory itself.
+        index_name = hashlib.sha256(os.path.normcase(self._cache_dir).encode("utf-8")).hexdigest()[:16]
+        self._index_path = os.path.join(index_dir or self._cache_dir, f"stat-index-{index_name}.json")
+        self._max_bytes = max_bytes
+        self._stat_index: Optional[Dict[str, List]] = None
+        self._index_dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_directory(
+        cls,
+        cache_dir: str,
+        index_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ) -> "ConversionCache":
+        key = os.path.normcase(os.path.abspath(cache_dir))
+        with cls._instances_lock:
+            cache = cls._instances.get(key)
+            if cache is None:
+                cache = cls(cache_dir, index_dir=index_dir, max_bytes=max_bytes)
+                cls._instances[key] = cache
+            return cache
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    def _load_stat_index(self) -> Dict[str, List]:
+        if self._stat_index is None:
+            try:
+                with open(self._index_path, "r", encoding="utf-8") as handle:
+                    loaded = json.load(handle)
+                self._stat_index = loaded if isinstance(loaded, dict) else {}
+            except (OSError, ValueError):
+                self._stat_index = {}
+        return self._stat_index
+
+    def content_hash(self, input_path: str) -> str:
+        path = os.path.abspath(input_path)
+        stat = os.stat(path)
+        fingerprint = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+        with self._lock:
+            known = self._load_stat_index().get(path)
+        if known and known[:3] == fingerprint:
+            return str(known[3])
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        with self._lock:
+            self._load_stat_index()[path] = fingerprint + [content_hash]
+            self._index_dirty = True
+        return content_hash
+
+    # Index entries are [size, mtime_ns, inode, content hash, entry keys...]; the
+    # keys let prune drop entries whose cached PDFs are all gone.
+    def entry_key(self, input_path: str, backend_identity: str) -> str:
+        path = os.path.abspath(input_path)
+        material = "\0".join([CACHE_FORMAT, self.content_hash(path), backend_identity])
+        key = hashlib.sha256(material.encode("utf-8")).hexdigest()
+        with self._lock:
+            known = self._load_stat_index().get(path)
+            if known is not None and key not in known[4:]:
+                known.append(key)
+                self._index_dirty = True
+        return key
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._entries_dir, key[:2], f"{key}.pdf")
+
+    def lookup(self, key: str) -> Optional[str]:
+        path = self._entry_path(key)
+        if os.path.isfile(path):
+            return path
+        return None
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        cached = self.lookup(key)
+        if cached is None:
+            return False
+        try:
+            shutil.copyfile(cached, output_path)
+        except OSError:
+            return False
+
+        try:
+            # Entry mtime doubles as the LRU clock shared by every process.
+            os.utime(cached)
+        except OSError:
+            pass
+        return True
+
+    def store(self, key: str, pdf_path: str) -> None:
+        entry_path = self._entry_path(key)
+        entry_dir = os.path.dirname(entry_path)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=entry_dir, prefix=f"{key}.", suffix=".tmp")
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, "wb") as handle, open(pdf_path, "rb") as source:
+                shutil.copyfileobj(source, handle)
+                handle.flush()
+                os.fsync(handle.fileno())
+            # Readers only ever see complete entries: they are published by rename.
+            os.replace(temp_path, entry_path)
+            entry_size = os.path.getsize(entry_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        try:
+            with FileLock(self._lock_path, timeout=STORE_PRUNE_LOCK_TIMEOUT):
+                total = self._read_size_hint()
+                if total is not None:
+                    total += entry_size
+                    self._write_size_hint(total)
+        except (OSError, TimeoutError):
+            return
+
+        # A cache without a size total yet (new, or written by an older
+        # version) is scanned once by prune, which records one.
+        if self._max_bytes is not None and (total is None or total > self._max_bytes):
+            # Eviction is best-effort: the entry is already stored, so a busy
+            # lock or unreadable cache directory must not fail the conversion.
+            try:
+                self.prune(self._max_bytes, lock_timeout=STORE_PRUNE_LOCK_TIMEOUT)
+            except (OSError, TimeoutError):
+                pass
+
+    def _read_size_hint(self) -> Optional[int]:
+        try:
+            with open(self._size_hint_path, "r", encoding="utf-8") as handle:
+                value = json.load(handle).get("bytes")
+        except (OSError, ValueError, AttributeError):
+            return None
+        return value if isinstance(value, int) and value >= 0 else None
+
+    def _write_size_hint(self, total: int) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self._cache_dir, prefix=f"{SIZE_HINT_NAME}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump({"bytes": total}, handle)
+            os.replace(temp_path, self._size_hint_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def _scan_entries(self) -> Tuple[List[Tuple[float, int, str]], List[Tuple[float, str]]]:
+        entries: List[Tuple[float, int, str]] = []
+        temp_files: List[Tuple[float, str]] = []
+        try:
+            shards = list(os.scandir(self._entries_dir))
+        except OSError:
+            return entries, temp_files
+
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            try:
+                children = list(os.scandir(shard.path))
+            except OSError:
+                continue
+            for child in children:
+                try:
+                    stat = child.stat()
+                except OSError:
+                    continue
+                if child.name.endswith(".tmp"):
+                    temp_files.append((stat.st_mtime, child.path))
+                elif child.name.endswith(".pdf"):
+                    entries.append((stat.st_mtime, stat.st_size, child.path))
+        return entries, temp_files
+
+    def prune(self, max_bytes: Optional[int] = None, lock_timeout: Optional[float] = None) -> Tuple[int, int]:
+        limit = self._max_bytes if max_bytes is None else max_bytes
+        removed = 0
+        freed = 0
+        evicted = set()
+
+        with FileLock(self._lock_path, timeout=lock_timeout):
+            entries, temp_files = self._scan_entries()
+
+            stale_before = time.time() - STALE_TEMP_SECONDS
+            for mtime, path in temp_files:
+                if mtime < stale_before:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+            total = sum(size for _, size, _ in entries)
+            if limit is not None and total > limit:
+                target = int(limit * EVICTION_TARGET_RATIO)
+                for _, size, path in sorted(entries):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    freed += size
+                    removed += 1
+                    evicted.add(path)
+            self._write_size_hint(total)
+
+        kept = {os.path.basename(path)[:-4] for _, _, path in entries if path not in evicted}
+        with self._lock:
+            index = self._load_stat_index()
+            orphaned = [path for path, known in index.items() if not any(key in kept for key in known[4:])]
+            for path in orphaned:
+                del index[path]
+            if orphaned:
+                self._index_dirty = True
+        self.flush()
+        return removed, freed
+
+    def total_size(self) -> int:
+        entries, _ = self._scan_entries()
+        return sum(size for _, size, _ in entries)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._index_dirty or self._stat_index is None:
+                return
+            snapshot = dict(self._stat_index)
+            self._index_dirty = False
+
+        index_dir = os.path.dirname(self._index_path)
+        try:
+            os.makedirs(index_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=index_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(snapshot, handle)
+            os.replace(temp_path, self._index_path)
+        except OSError:
+            pass
@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+from queue import Queue
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .cancellation import child_token
+from .conversion_types import ConversionCancelledError
+from .metrics import ACTIVE_WORKERS, SPECULATIVE_ATTEMPTS
+
+
+class ConversionPool:
+    # With speculation on, a worker that finds no pending units starts a second
+    # attempt of a straggler: a unit running for STRAGGLER_FACTOR times the
+    # median unit time (and at least STRAGGLER_MIN_SECONDS) once
+    # STRAGGLER_MIN_SAMPLES units have finished. The attempt to claim the unit
+    # first wins and the other is cancelled.
+    STRAGGLER_FACTOR = 3.0
+    STRAGGLER_MIN_SECONDS = 10.0
+    STRAGGLER_MIN_SAMPLES = 3
+    MAX_ATTEMPTS = 2
+
+    def __init__(self, max_workers: int, speculative: bool = False) -> None:
+        self._max_workers = max(1, max_workers)
+        self._speculative = speculative and self._max_workers > 1
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    # Yields unit indexes as they complete. The first failure stops dispatch and
+    # cancels in-flight units; it is raised once every worker has exited.
+    #
+    # work(unit, is_cancelled, claim) converts one unit. With speculation on,
+    # two attempts of a unit can run at once, so work must write its outputs
+    # somewhere private and call claim() when done: True means this attempt won
+    # and should publish them, False that it lost and should discard them.
+    # Returning without calling claim() claims implicitly. An attempt that
+    # finished with per-file failures calls claim(failed=True), which waits
+    # while a twin is still running: the twin's result is used if it succeeds,
+    # and this attempt's partial result if the twin fails or raises.
+    def run(
+        self,
+        units: List[Any],
+        work: Callable[[Any, Callable[[], bool], Callable[..., bool]], None],
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> Iterator[int]:
+        pending: Deque[Tuple[int, Any]] = deque(enumerate(units))
+        # Units started but not yet finished, by index.
+        running: Dict[int, Dict[str, Any]] = {}
+        durations: List[float] = []
+        condition = threading.Condition()
+        results: "Queue[Tuple[str, int, Optional[BaseException]]]" = Queue()
+        abort = threading.Event()
+        # Units get one token that fires on the caller's cancel and on abort, so
+        # blocked backend runs stop at once instead of at their next poll.
+        units_token, detach = child_token(is_cancelled)
+
+        def wake() -> None:
+            with condition:
+                condition.notify_all()
+
+        remove_wake = units_token.add_callback(wake)
+
+        def stop() -> None:
+            abort.set()
+            units_token.cancel()
+
+        def straggler_after() -> Optional[float]:
+            if len(durations) < self.STRAGGLER_MIN_SAMPLES:
+                return None
+            ordered = sorted(durations)
+            return max(self.STRAGGLER_MIN_SECONDS, self.STRAGGLER_FACTOR * ordered[len(ordered) // 2])
+
+        # Called with the condition held. Returns the unit to attempt next, or
+        # None when this worker has nothing left to do.
+        def next_attempt() -> Optional[Tuple[int, Dict[str, Any]]]:
+            while not units_token.is_cancelled():
+                if pending:
+                    index, unit = pending.popleft()
+                    state = {
+                        "unit": unit,
+                        "started": time.monotonic(),
+                        "tokens": [],
+                        "live": 0,
+                        "winner": None,
+                        "error": None,
+                        "settled": set(),
+                        "waiting": set(),
+                    }
+                    running[index] = state
+                    return index, state
+                if not self._speculative:
+                    return None
+                candidates = [
+                    (index, state)
+                    for index, state in running.items()
+                    if state["winner"] is None and state["live"] and len(state["tokens"]) < self.MAX_ATTEMPTS
+                ]
+                if not candidates:
+                    return None
+                threshold = straggler_after()
+                if threshold is None:
+                    condition.wait()
+                    continue
+                index, state = min(candidates, key=lambda item: item[1]["started"])
+                remaining = state["started"] + threshold - time.monotonic()
+                if remaining <= 0:
+                    return index, state
+                condition.wait(remaining)
+            return None
+
+        def run_attempt(index: int, state: Dict[str, Any]) -> bool:
+            token, detach_attempt = child_token(units_token)
+            with condition:
+                state["tokens"].append(token)
+                state["live"] += 1
+                speculative = len(state["tokens"]) > 1
+            if speculative:
+                SPECULATIVE_ATTEMPTS.inc(outcome="started")
+
+            def running_twins() -> bool:
+                return any(
+                    other is not token
+                    and other not in state["settled"]
+                    and other not in state["waiting"]
+                    and not other.is_cancelled()
+                    for other in state["tokens"]
+                )
+
+            def claim(failed: bool = False) -> bool:
+                with condition:
+                    if failed:
+                        # A twin that is itself waiting does not count, so two
+                        # failed attempts cannot wait for each other.
+                        state["waiting"].add(token)
+                        while state["winner"] is None and not token.is_cancelled() and running_twins():
+                            condition.wait()
+                        state["waiting"].discard(token)
+                    if state["winner"] is None and not token.is_cancelled():
+                        state["winner"] = token
+                        losers = [other for other in state["tokens"] if other is not token]
+                        condition.notify_all()
+                    else:
+                        return state["winner"] is token
+                for other in losers:
+                    other.cancel()
+                return True
+
+            attempt_started = time.monotonic()
+            error: Optional[BaseException] = None
+            won = False
+            ACTIVE_WORKERS.inc()
+            try:
+                work(state["unit"], token, claim)
+                won = claim()
+            except BaseException as exc:
+                error = exc
+            finally:
+                ACTIVE_WORKERS.dec()
+                detach_attempt()
+
+            with condition:
+                state["live"] -= 1
+                state["settled"].add(token)
+                outcome: Optional[Tuple[str, int, Optional[BaseException]]] = None
+                if won:
+                    durations.append(time.monotonic() - attempt_started)
+                    running.pop(index, None)
+                    outcome = ("done", index, None)
+                elif state["winner"] is None and error is not None:
+                    # An attempt that fails while its twin is still running
+                    # leaves the unit to the twin; the error is only raised
+                    # once no attempt is left.
+                    if state["error"] is None or isinstance(state["error"], ConversionCancelledError):
+                        state["error"] = error
+                    if not state["live"]:
+                        running.pop(index, None)
+                        outcome = ("error", index, state["error"])
+                condition.notify_all()
+
+            if won and len(state["tokens"]) > 1:
+                SPECULATIVE_ATTEMPTS.inc(outcome="won" if speculative else "lost")
+            if outcome is not None:
+                results.put(outcome)
+            return outcome is None or outcome[0] != "error"
+
+        def worker() -> None:
+            try:
+                while True:
+                    with condition:
+                        attempt = next_attempt()
+                    if attempt is None or not run_attempt(*attempt):
+                        return
+            finally:
+                results.put(("exit", -1, None))
+
+        worker_count = min(self._max_workers, len(units))
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(worker_count)]
+        for thread in threads:
+            thread.start()
+
+        failure: Optional[BaseException] = None
+        live_workers = worker_count
+        try:
+            while live_workers:
+                kind, index, error = results.get()
+                if kind == "exit":
+                    live_workers -= 1
+                elif kind == "error":
+                    stop()
+                    if failure is None or isinstance(failure, ConversionCancelledError):
+                        failure = error
+                elif failure is None and not abort.is_set():
+                    yield index
+        finally:
+            stop()
+            remove_wake()
+            detach()
+            for thread in threads:
+                thread.join()
+
+        if failure is not None:
+            raise failure
+        if pending or running:
+            raise ConversionCancelledError("Conversion cancelled")
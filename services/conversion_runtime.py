@@ -1,10 +1,17 @@
-import multiprocessing as mp
 import os
 import subprocess
-import time
-from typing import Callable, List, Optional
+import threading
+from collections import deque
+from typing import IO, TYPE_CHECKING, Callable, Deque, List, Optional
 
-from .conversion_types import ConversionCancelledError
+from .cancellation import cancellation_token, child_token, wait_for
+from .conversion_types import ConversionCancelledError, ConversionStalledError, ConversionTimeoutError
+from .process_tree import process_group_options, terminate_process_tree
+from .stall_detection import StallWatchdog
+from .tracing import span
+
+if TYPE_CHECKING:
+    import multiprocessing as mp
 
 
 def powerpoint_worker(input_path: str, output_path: str, result_queue: "mp.Queue") -> None:
@@ -52,42 +59,109 @@ def wps_worker(input_path: str, output_path: str, result_queue: "mp.Queue") -> N
         result_queue.put(str(exc))
 
 
+OUTPUT_TAIL_LIMIT = 64 * 1024
+
+
+# Keeps only the last ``limit`` characters written to it, so a backend that
+# logs megabytes (soffice does with broken fonts) costs bounded memory while
+# the end of its output is still available for error messages.
+class OutputTail:
+    def __init__(self, limit: int = OUTPUT_TAIL_LIMIT) -> None:
+        self._limit = max(1, limit)
+        self._chunks: Deque[str] = deque()
+        self._size = 0
+        self._truncated = False
+        self._lock = threading.Lock()
+
+    def append(self, text: str) -> None:
+        with self._lock:
+            self._chunks.append(text)
+            self._size += len(text)
+            while self._size > self._limit:
+                excess = self._size - self._limit
+                head = self._chunks[0]
+                if len(head) <= excess:
+                    self._chunks.popleft()
+                    self._size -= len(head)
+                else:
+                    self._chunks[0] = head[excess:]
+                    self._size -= excess
+                self._truncated = True
+
+    def text(self) -> str:
+        with self._lock:
+            body = "".join(self._chunks)
+            return f"[...]\n{body}" if self._truncated else body
+
+
+# Reads a pipe until EOF so the child never blocks on a full pipe buffer.
+# Lines are read in bounded pieces, so one huge line cannot grow memory either.
+def _drain(stream: Optional[IO[str]], tail: OutputTail, on_line: Optional[Callable[[str], None]] = None) -> None:
+    if stream is None:
+        return
+    try:
+        for line in iter(lambda: stream.readline(8192), ""):
+            tail.append(line)
+            if on_line is not None:
+                try:
+                    on_line(line.rstrip("\n"))
+                except Exception:
+                    pass
+    except (OSError, ValueError):
+        pass
+
+
 def run_cancellable_subprocess(
     cmd: List[str],
-    timeout: int,
+    timeout: float,
     is_cancelled: Optional[Callable[[], bool]] = None,
+    on_stdout_line: Optional[Callable[[str], None]] = None,
+    output_limit: int = OUTPUT_TAIL_LIMIT,
+    stall_timeout: Optional[float] = None,
 ) -> subprocess.CompletedProcess:
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-
-    start_time = time.time()
-    while True:
-        if is_cancelled and is_cancelled():
-            process.terminate()
-            try:
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                process.kill()
-            raise ConversionCancelledError("Conversion cancelled")
-
-        return_code = process.poll()
-        if return_code is not None:
-            stdout, stderr = process.communicate()
-            return subprocess.CompletedProcess(cmd, return_code, stdout, stderr)
-
-        if time.time() - start_time > timeout:
-            process.terminate()
-            try:
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                process.kill()
-            raise RuntimeError("Conversion timed out")
+    with span("spawn", program=os.path.basename(cmd[0])):
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            **process_group_options(),
+        )
+
+    stdout_tail = OutputTail(output_limit)
+    stderr_tail = OutputTail(output_limit)
+    readers = [
+        threading.Thread(target=_drain, args=(process.stdout, stdout_tail, on_stdout_line), daemon=True),
+        threading.Thread(target=_drain, args=(process.stderr, stderr_tail), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    token, detach = child_token(is_cancelled)
+    watchdog = StallWatchdog(process.pid, stall_timeout, token.cancel).start() if stall_timeout else None
+    try:
+        outcome = wait_for(process.wait, token, timeout)
+        if outcome != "done":
+            terminate_process_tree(process)
+            if watchdog is not None and watchdog.stalled:
+                raise ConversionStalledError(f"Conversion stalled: no CPU or I/O activity for {stall_timeout:g} s")
+            if outcome == "cancelled":
+                raise ConversionCancelledError("Conversion cancelled")
+            raise ConversionTimeoutError("Conversion timed out")
+    finally:
+        if watchdog is not None:
+            watchdog.stop()
+        detach()
+        # A grandchild that inherited the pipes can keep them open after the
+        # launcher exits, so readers get a bounded wait. A reader still running
+        # keeps its pipe, since closing it under a blocked read would hang.
+        for reader, stream in zip(readers, (process.stdout, process.stderr)):
+            reader.join(timeout=5)
+            if stream is not None and not reader.is_alive():
+                stream.close()
 
-        time.sleep(0.2)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout_tail.text(), stderr_tail.text())
 
 
 def run_cancellable_worker(
@@ -95,19 +169,26 @@ def run_cancellable_worker(
     input_path: str,
     output_path: str,
     is_cancelled: Optional[Callable[[], bool]] = None,
+    timeout: Optional[float] = None,
 ) -> None:
+    import multiprocessing as mp
+    from multiprocessing.connection import wait as wait_for_sentinels
+
     ctx = mp.get_context("spawn")
-    result_queue: mp.Queue = ctx.Queue()
+    result_queue: "mp.Queue" = ctx.Queue()
     process = ctx.Process(target=worker_func, args=(input_path, output_path, result_queue), daemon=True)
-    process.start()
+    with span("spawn", program=worker_func.__name__):
+        process.start()
 
     try:
-        while process.is_alive():
-            if is_cancelled and is_cancelled():
-                process.terminate()
-                process.join(timeout=5)
+        # Waiting on the sentinel does not reap the child, so join() below still does.
+        outcome = wait_for(lambda: wait_for_sentinels([process.sentinel]), cancellation_token(is_cancelled), timeout)
+        if outcome != "done":
+            process.terminate()
+            process.join(timeout=5)
+            if outcome == "cancelled":
                 raise ConversionCancelledError("Conversion cancelled")
-            time.sleep(0.2)
+            raise ConversionTimeoutError("Conversion timed out")
 
         process.join(timeout=5)
         if process.exitcode not in (0, None):
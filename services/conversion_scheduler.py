@@ -0,0 +1,134 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set
+
+from .cancellation import cancellation_token
+from .conversion_types import ConversionCancelledError
+from .metrics import ACTIVE_UNITS, QUEUED_UNITS
+
+
+# Admits file-level conversion units from every task under one process-wide
+# concurrency cap. Waiting owners are served round-robin so a task with
+# hundreds of files cannot starve a task that was started after it.
+class ConversionScheduler:
+    def __init__(self, max_concurrency: int) -> None:
+        self._max_concurrency = max(1, max_concurrency)
+        self._condition = threading.Condition()
+        self._active: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[object]] = {}
+        self._rotation: Deque[str] = deque()
+        self._granted: Set[object] = set()
+        self.on_change: Optional[Callable[[], None]] = None
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    def _active_total(self) -> int:
+        return sum(self._active.values())
+
+    def _dispatch(self) -> None:
+        while self._rotation and self._active_total() < self._max_concurrency:
+            owner = self._rotation.popleft()
+            tickets = self._waiting[owner]
+            self._granted.add(tickets.popleft())
+            self._active[owner] = self._active.get(owner, 0) + 1
+            if tickets:
+                self._rotation.append(owner)
+            else:
+                del self._waiting[owner]
+        self._condition.notify_all()
+
+    def _withdraw(self, owner: str, ticket: object) -> None:
+        tickets = self._waiting.get(owner)
+        if tickets is None or ticket not in tickets:
+            return
+        tickets.remove(ticket)
+        if not tickets:
+            del self._waiting[owner]
+            self._rotation.remove(owner)
+
+    def _notify_change(self) -> None:
+        with self._condition:
+            QUEUED_UNITS.set(sum(len(tickets) for tickets in self._waiting.values()))
+            ACTIVE_UNITS.set(self._active_total())
+        if self.on_change:
+            try:
+                self.on_change()
+            except Exception:
+                pass
+
+    def _wake(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+
+    def acquire(self, owner: str, is_cancelled: Optional[Callable[[], bool]] = None) -> None:
+        token = cancellation_token(is_cancelled)
+        ticket = object()
+        with self._condition:
+            self._waiting.setdefault(owner, deque()).append(ticket)
+            if owner not in self._rotation:
+                self._rotation.append(owner)
+            self._dispatch()
+
+        self._notify_change()
+        remove_callback = token.add_callback(self._wake) if token is not None else None
+        try:
+            with self._condition:
+                while ticket not in self._granted:
+                    if token is not None and token.is_cancelled():
+                        self._withdraw(owner, ticket)
+                        self._condition.notify_all()
+                        break
+                    self._condition.wait()
+                else:
+                    self._granted.discard(ticket)
+                    ticket = None
+        finally:
+            if remove_callback is not None:
+                remove_callback()
+
+        self._notify_change()
+        if ticket is not None:
+            raise ConversionCancelledError("Conversion cancelled")
+
+    def release(self, owner: str) -> None:
+        with self._condition:
+            count = self._active.get(owner, 0) - 1
+            if count > 0:
+                self._active[owner] = count
+            else:
+                self._active.pop(owner, None)
+            self._dispatch()
+        self._notify_change()
+
+    @contextmanager
+    def slot(self, owner: str, is_cancelled: Optional[Callable[[], bool]] = None) -> Iterator[None]:
+        self.acquire(owner, is_cancelled)
+        try:
+            yield
+        finally:
+            self.release(owner)
+
+    def queue_position(self, owner: str) -> int:
+        with self._condition:
+            if owner not in self._rotation:
+                return 0
+            return list(self._rotation).index(owner) + 1
+
+    def active_count(self, owner: Optional[str] = None) -> int:
+        with self._condition:
+            if owner is None:
+                return self._active_total()
+            return self._active.get(owner, 0)
+
+    def waiting_count(self, owner: Optional[str] = None) -> int:
+        with self._condition:
+            if owner is None:
+                return sum(len(tickets) for tickets in self._waiting.values())
+            return len(self._waiting.get(owner, ()))
+
+    def waiting_owners(self) -> List[str]:
+        with self._condition:
+            return list(self._rotation)
@@ -0,0 +1,109 @@
+import os
+import sys
+from typing import Optional
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def env_optional_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = env_int(name, default if default is not None else -1)
+    return value if value >= 0 else None
+
+
+def env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    return value not in ("0", "false", "no", "off")
+
+
+def default_cache_root() -> str:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "ppt2pdf", "Cache")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Caches", "ppt2pdf")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ppt2pdf")
+
+
+def default_worker_count() -> int:
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+def default_concurrency_cap() -> int:
+    return max(1, min(8, (os.cpu_count() or 2) // 2))
+
+
+class ConversionSettings:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        cache_enabled: bool = True,
+        cache_dir: Optional[str] = None,
+        cache_max_mb: int = 2048,
+        merge_stream_threshold: Optional[int] = 200,
+        trace_path: Optional[str] = None,
+        trace_max_events: int = 100_000,
+        metrics_file: Optional[str] = None,
+        metrics_interval: int = 15,
+        timeout_floor: int = 60,
+        timeout_ceiling: int = 1800,
+        timeout_history_path: Optional[str] = None,
+        stall_timeout: int = 30,
+        speculate: bool = True,
+        preflight: bool = True,
+    ) -> None:
+        self.max_workers = max(1, max_workers if max_workers is not None else default_worker_count())
+        self.max_concurrency = max(1, max_concurrency if max_concurrency is not None else default_concurrency_cap())
+        self.cache_enabled = cache_enabled
+        self.cache_dir = cache_dir or os.path.join(default_cache_root(), "pdf")
+        self.cache_index_dir = os.path.join(default_cache_root(), "index")
+        self.cache_max_bytes = cache_max_mb * 1024 * 1024 if cache_max_mb > 0 else None
+        # Merges of more inputs than this stream pages to disk with flat memory use.
+        self.merge_stream_threshold = merge_stream_threshold
+        self.trace_path = trace_path
+        # Long-running serve and watch sessions keep only the latest trace events.
+        self.trace_max_events = max(1, trace_max_events)
+        self.metrics_file = metrics_file
+        self.metrics_interval = max(1, metrics_interval)
+        # Backend timeouts adapt to deck size and past run times within these bounds (seconds).
+        self.timeout_floor = max(1, timeout_floor)
+        self.timeout_ceiling = max(self.timeout_floor, timeout_ceiling)
+        self.timeout_history_path = timeout_history_path or os.path.join(default_cache_root(), "timeouts.json")
+        # Headless backends with no CPU or I/O activity for this long are killed (Linux only, 0 = off).
+        self.stall_timeout = max(0, stall_timeout)
+        # Parallel runs start a second attempt of a deck that falls far behind its batch.
+        self.speculate = speculate
+        # Inputs are checked for damage, encryption and wrong file types before a backend is launched.
+        self.preflight = preflight
+
+    @classmethod
+    def from_env(cls) -> "ConversionSettings":
+        return cls(
+            max_workers=env_int("PPT2PDF_WORKERS", default_worker_count()),
+            max_concurrency=env_int("PPT2PDF_MAX_CONCURRENCY", default_concurrency_cap()),
+            cache_enabled=env_flag("PPT2PDF_CACHE", True),
+            cache_dir=os.environ.get("PPT2PDF_CACHE_DIR") or None,
+            cache_max_mb=env_int("PPT2PDF_CACHE_MAX_MB", 2048),
+            merge_stream_threshold=env_optional_int("PPT2PDF_MERGE_STREAM_THRESHOLD", 200),
+            trace_path=os.environ.get("PPT2PDF_TRACE") or None,
+            trace_max_events=env_int("PPT2PDF_TRACE_MAX_EVENTS", 100_000),
+            metrics_file=os.environ.get("PPT2PDF_METRICS_FILE") or None,
+            metrics_interval=env_int("PPT2PDF_METRICS_INTERVAL", 15),
+            timeout_floor=env_int("PPT2PDF_TIMEOUT_FLOOR", 60),
+            timeout_ceiling=env_int("PPT2PDF_TIMEOUT_CEILING", 1800),
+            timeout_history_path=os.environ.get("PPT2PDF_TIMEOUT_HISTORY_FILE") or None,
+            stall_timeout=env_int("PPT2PDF_STALL_TIMEOUT", 30),
+            speculate=env_flag("PPT2PDF_SPECULATE", True),
+            preflight=env_flag("PPT2PDF_PREFLIGHT", True),
+        )
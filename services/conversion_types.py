@@ -13,6 +13,15 @@ class ConversionCancelledError(Exception):
     pass
 
 
+class ConversionTimeoutError(RuntimeError):
+    pass
+
+
+# The backend stopped using CPU and doing I/O before its timeout ran out.
+class ConversionStalledError(ConversionTimeoutError):
+    pass
+
+
 def backend_display_name(backend: ConversionBackend) -> str:
     if backend == ConversionBackend.POWERPOINT:
         return "Microsoft PowerPoint"
@@ -1,22 +1,313 @@
 import os
 import shutil
 import tempfile
-import time
-from typing import Callable, List, Optional
-
-from pypdf import PdfWriter
+import threading
+import uuid
+from contextlib import closing
+from typing import Callable, Dict, Generator, List, Optional, Set, Tuple
 
+from .conversion_cache import ConversionCache
+from .conversion_pool import ConversionPool
+from .conversion_scheduler import ConversionScheduler
 from .conversion_types import ConversionCancelledError
+from .pdf_merge import OrderedPdfMerger
+from .tracing import span
 
 
 class ConversionWorkflows:
     def __init__(
         self,
         convert_single: Callable[[str, str, Optional[Callable[[], bool]]], None],
+        convert_batch: Optional[
+            Callable[[List[Tuple[str, str]], Optional[Callable[[int], None]], Optional[Callable[[], bool]]], None]
+        ] = None,
+        plan_batches: Optional[Callable[[List[str], int], List[List[int]]]] = None,
+        max_workers: Optional[Callable[[], int]] = None,
+        scheduler: Optional[ConversionScheduler] = None,
+        cache: Optional[ConversionCache] = None,
+        backend_identity: Optional[Callable[[], str]] = None,
+        merge_stream_threshold: Optional[int] = None,
+        speculate: bool = False,
+        preflight: Optional[Callable[[str], Optional[str]]] = None,
     ) -> None:
         self._convert_single = convert_single
+        self._convert_batch = convert_batch
+        self._plan_batches = plan_batches
+        self._max_workers = max_workers
+        self._scheduler = scheduler
+        self._cache = cache
+        self._backend_identity = backend_identity
+        self._merge_stream_threshold = merge_stream_threshold
+        self._speculate = speculate
+        self._preflight = preflight
         self.temp_dir: Optional[str] = None
         self.temp_pdfs: List[str] = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # (input path, reason) for every input the last run skipped in preflight.
+        self.rejected_inputs: List[Tuple[str, str]] = []
+
+    def _worker_count(self) -> int:
+        if self._max_workers is None:
+            return 1
+        return max(1, self._max_workers())
+
+    def _conversion_units(self, ppt_files: List[str], workers: int) -> List[List[int]]:
+        if self._plan_batches is None or self._convert_batch is None:
+            return [[index] for index in range(len(ppt_files))]
+        return self._plan_batches(ppt_files, workers)
+
+    def _convert_unit(
+        self,
+        jobs: List[Tuple[str, str]],
+        on_file_started: Callable[[int], None],
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        if len(jobs) > 1 and self._convert_batch is not None:
+            self._convert_batch(jobs, on_file_started, is_cancelled)
+            return
+
+        for index, (input_path, output_path) in enumerate(jobs):
+            if is_cancelled and is_cancelled():
+                raise ConversionCancelledError("Conversion cancelled")
+            on_file_started(index)
+            self._convert_single(input_path, output_path, is_cancelled)
+
+    def _cache_summary(self) -> str:
+        if self._cache is None or (self.cache_hits == 0 and self.cache_misses == 0):
+            return ""
+        return f" (cache: {self.cache_hits} hits, {self.cache_misses} misses)"
+
+    def _skipped_summary(self) -> str:
+        if not self.rejected_inputs:
+            return ""
+        return f" ({len(self.rejected_inputs)} skipped)"
+
+    # Splits inputs into the indexes worth handing to a backend and the reasons
+    # the others were rejected, so a bad file fails on its own in milliseconds
+    # instead of after a backend launch.
+    def _preflight_inputs(
+        self,
+        input_paths: List[str],
+        progress_callback: Optional[Callable[[str, float], None]],
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[List[int], Dict[int, str]]:
+        self.rejected_inputs = []
+        if self._preflight is None:
+            return list(range(len(input_paths))), {}
+
+        accepted: List[int] = []
+        rejected: Dict[int, str] = {}
+        with span("preflight", files=len(input_paths)):
+            for index, input_path in enumerate(input_paths):
+                if is_cancelled and is_cancelled():
+                    raise ConversionCancelledError("Conversion cancelled")
+                reason = self._preflight(input_path)
+                if reason is None:
+                    accepted.append(index)
+                else:
+                    rejected[index] = reason
+                    self.rejected_inputs.append((input_path, reason))
+
+        if rejected and progress_callback:
+            progress_callback(f"Skipping {len(rejected)} file(s) that cannot be converted", 0)
+        if not accepted and rejected:
+            raise RuntimeError(
+                "None of the files can be converted:\n"
+                + "\n".join(f"{os.path.basename(path)}: {reason}" for path, reason in self.rejected_inputs)
+            )
+        return accepted, rejected
+
+    def _resolve_cache_hits(
+        self,
+        jobs: List[Tuple[str, str]],
+        progress_callback: Optional[Callable[[str, float], None]],
+        progress_span: float,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[List[int], List[int], Dict[int, str]]:
+        self.cache_hits = 0
+        self.cache_misses = 0
+        if self._cache is None or self._backend_identity is None:
+            return [], list(range(len(jobs))), {}
+
+        try:
+            backend_identity = self._backend_identity()
+        except Exception:
+            return [], list(range(len(jobs))), {}
+
+        hits: List[int] = []
+        misses: List[int] = []
+        keys: Dict[int, str] = {}
+        for index, (input_path, output_path) in enumerate(jobs):
+            if is_cancelled and is_cancelled():
+                raise ConversionCancelledError("Conversion cancelled")
+            try:
+                keys[index] = self._cache.entry_key(input_path, backend_identity)
+            except OSError:
+                misses.append(index)
+                continue
+
+            if self._cache.fetch(keys[index], output_path):
+                hits.append(index)
+                if progress_callback:
+                    progress_callback(
+                        f"Using cached PDF {len(hits)}/{len(jobs)}: {os.path.basename(input_path)}",
+                        (len(hits) / len(jobs)) * progress_span,
+                    )
+            else:
+                misses.append(index)
+
+        self.cache_hits = len(hits)
+        self.cache_misses = len(misses)
+        self._cache.flush()
+        return hits, misses, keys
+
+    def _convert_files(
+        self,
+        jobs: List[Tuple[str, str]],
+        progress_callback: Optional[Callable[[str, float], None]],
+        progress_span: float,
+        workers: int,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        on_unit_started: Optional[Callable[[List[int]], None]] = None,
+        owner: Optional[str] = None,
+        failures: Optional[Dict[int, str]] = None,
+    ) -> Generator[List[int], None, None]:
+        total_files = len(jobs)
+        hits, pending, cache_keys = self._resolve_cache_hits(jobs, progress_callback, progress_span, is_cancelled)
+        if hits:
+            yield hits
+        if not pending:
+            return
+
+        planned = self._conversion_units([jobs[i][0] for i in pending], workers)
+        units = [[pending[position] for position in unit] for unit in planned]
+        counts: Dict[str, int] = {"started": 0, "done": len(hits)}
+        counts_lock = threading.Lock()
+        started_files: Set[int] = set()
+        # Speculative attempts of the same unit run side by side, so each one
+        # converts into files of its own and only the winner moves them into place.
+        speculative = self._speculate and workers > 1
+
+        scheduler_owner = owner or f"workflow-{id(self)}"
+
+        def work(unit: List[int], unit_cancelled: Callable[[], bool], claim: Callable[..., bool]) -> None:
+            if self._scheduler is None:
+                convert(unit, unit_cancelled, claim)
+                return
+            with span("queue", owner=scheduler_owner, files=len(unit)):
+                self._scheduler.acquire(scheduler_owner, unit_cancelled)
+            try:
+                convert(unit, unit_cancelled, claim)
+            finally:
+                self._scheduler.release(scheduler_owner)
+
+        def convert(unit: List[int], unit_cancelled: Callable[[], bool], claim: Callable[..., bool]) -> None:
+            def on_file_started(position: int) -> None:
+                with counts_lock:
+                    if unit[position] in started_files:
+                        return
+                    started_files.add(unit[position])
+                    counts["started"] += 1
+                    started, done = counts["started"], counts["done"]
+                if progress_callback:
+                    progress_callback(
+                        f"Converting {started}/{total_files}: {os.path.basename(jobs[unit[position]][0])}",
+                        (done / total_files) * progress_span,
+                    )
+
+            if on_unit_started:
+                on_unit_started(unit)
+            unit_jobs = [jobs[i] for i in unit]
+            if speculative:
+                unit_jobs = [(input_path, self._attempt_output_path(output_path)) for input_path, output_path in unit_jobs]
+            unit_failures: Dict[int, str] = {}
+            try:
+                if failures is None:
+                    self._convert_unit(unit_jobs, on_file_started, unit_cancelled)
+                else:
+                    convert_tolerant(unit, unit_jobs, on_file_started, unit_cancelled, unit_failures)
+                # A failed attempt leaves the unit to a twin that may still succeed.
+                if not claim(failed=bool(unit_failures)):
+                    return
+                if speculative:
+                    for i, (_input_path, attempt_output) in zip(unit, unit_jobs):
+                        if i not in unit_failures:
+                            os.replace(attempt_output, jobs[i][1])
+            finally:
+                if speculative:
+                    for _input_path, attempt_output in unit_jobs:
+                        if os.path.exists(attempt_output):
+                            try:
+                                os.remove(attempt_output)
+                            except OSError:
+                                pass
+            if failures is not None and unit_failures:
+                with counts_lock:
+                    failures.update(unit_failures)
+            if self._cache is not None:
+                for i in unit:
+                    if i in cache_keys and i not in unit_failures:
+                        self._cache.store(cache_keys[i], jobs[i][1])
+            with counts_lock:
+                counts["done"] += len(unit)
+
+        # A failed batch is retried file by file so one broken deck only fails itself.
+        def convert_tolerant(
+            unit: List[int],
+            unit_jobs: List[Tuple[str, str]],
+            on_file_started: Callable[[int], None],
+            unit_cancelled: Callable[[], bool],
+            unit_failures: Dict[int, str],
+        ) -> None:
+            try:
+                self._convert_unit(unit_jobs, on_file_started, unit_cancelled)
+                return
+            except ConversionCancelledError:
+                raise
+            except Exception as exc:
+                if len(unit) == 1:
+                    unit_failures[unit[0]] = str(exc)
+                    return
+
+            for i, job in zip(unit, unit_jobs):
+                try:
+                    self._convert_unit([job], lambda _position: None, unit_cancelled)
+                except ConversionCancelledError:
+                    raise
+                except Exception as exc:
+                    unit_failures[i] = str(exc)
+
+        pool = ConversionPool(workers, speculative=speculative)
+        for unit_index in pool.run(units, work, is_cancelled):
+            yield units[unit_index]
+
+    def convert_jobs(
+        self,
+        jobs: List[Tuple[str, str]],
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        owner: Optional[str] = None,
+    ) -> Dict[int, str]:
+        accepted, failures = self._preflight_inputs([input_path for input_path, _ in jobs], progress_callback, is_cancelled)
+        accepted_failures: Dict[int, str] = {}
+        converted_units = self._convert_files(
+            [jobs[i] for i in accepted],
+            progress_callback,
+            100,
+            self._worker_count(),
+            is_cancelled,
+            owner=owner,
+            failures=accepted_failures,
+        )
+        with closing(converted_units):
+            for _unit in converted_units:
+                pass
+
+        if is_cancelled and is_cancelled():
+            raise ConversionCancelledError("Conversion cancelled")
+        failures.update((accepted[position], reason) for position, reason in accepted_failures.items())
+        return failures
 
     def merge_pdfs(
         self,
@@ -24,17 +315,17 @@ class ConversionWorkflows:
         output_path: str,
         is_cancelled: Optional[Callable[[], bool]] = None,
     ) -> None:
-        merger = PdfWriter()
+        merger = OrderedPdfMerger(len(pdf_list), output_path, self._merge_stream_threshold)
         try:
-            for pdf in pdf_list:
+            for index, pdf in enumerate(pdf_list):
                 if is_cancelled and is_cancelled():
                     raise ConversionCancelledError("Conversion cancelled")
-                merger.append(pdf)
+                merger.add(index, pdf)
 
             if is_cancelled and is_cancelled():
                 raise ConversionCancelledError("Conversion cancelled")
 
-            merger.write(output_path)
+            merger.write()
         finally:
             merger.close()
 
@@ -45,37 +336,60 @@ class ConversionWorkflows:
         progress_callback: Optional[Callable[[str, float], None]] = None,
         delete_temp: bool = True,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        owner: Optional[str] = None,
+        allow_skipped: bool = True,
     ) -> None:
         self.temp_pdfs = []
+        accepted, rejected = self._preflight_inputs(ppt_files, progress_callback, is_cancelled)
+        # Callers that cannot show which decks are missing from the merged PDF
+        # ask for an error instead of an incomplete result.
+        if rejected and not allow_skipped:
+            raise RuntimeError(
+                f"{len(rejected)} file(s) cannot be converted, so the merged PDF would be incomplete:\n"
+                + "\n".join(f"{os.path.basename(path)}: {reason}" for path, reason in self.rejected_inputs)
+            )
+        ppt_files = [ppt_files[i] for i in accepted]
         self.temp_dir = tempfile.mkdtemp()
 
         try:
             total_files = len(ppt_files)
+            temp_dir = self.temp_dir
+            pdf_paths = [os.path.join(temp_dir, f"temp_{i}.pdf") for i in range(total_files)]
 
-            for i, ppt_file in enumerate(ppt_files):
-                if is_cancelled and is_cancelled():
-                    raise ConversionCancelledError("Conversion cancelled")
+            jobs = list(zip(ppt_files, pdf_paths))
+            converted_units = self._convert_files(
+                jobs,
+                progress_callback,
+                80,
+                self._worker_count(),
+                is_cancelled,
+                owner=owner,
+            )
 
-                if progress_callback:
-                    progress_callback(
-                        f"Converting {i + 1}/{total_files}: {os.path.basename(ppt_file)}",
-                        (i / total_files) * 80,
-                    )
-
-                pdf_name = os.path.join(self.temp_dir, f"temp_{i}.pdf")
-                self._convert_single(ppt_file, pdf_name, is_cancelled)
-                self.temp_pdfs.append(pdf_name)
+            # Decks are appended while later ones are still converting, so only the
+            # final write is left once the last conversion lands.
+            merger = OrderedPdfMerger(total_files, output_path, self._merge_stream_threshold)
+            try:
+                with closing(converted_units):
+                    for unit in converted_units:
+                        self.temp_pdfs.extend(pdf_paths[i] for i in unit)
+                        for i in unit:
+                            if is_cancelled and is_cancelled():
+                                raise ConversionCancelledError("Conversion cancelled")
+                            merger.add(i, pdf_paths[i], os.path.splitext(os.path.basename(ppt_files[i]))[0])
 
                 if is_cancelled and is_cancelled():
                     raise ConversionCancelledError("Conversion cancelled")
 
-            if progress_callback:
-                progress_callback("Merging PDFs...", 90)
+                if progress_callback:
+                    progress_callback("Writing merged PDF...", 90)
 
-            self.merge_pdfs(self.temp_pdfs, output_path, is_cancelled=is_cancelled)
+                merger.write()
+            finally:
+                merger.close()
 
             if progress_callback:
-                progress_callback("Conversion complete!", 100)
+                progress_callback(f"Conversion complete!{self._cache_summary()}{self._skipped_summary()}", 100)
         except ConversionCancelledError:
             if os.path.exists(output_path):
                 try:
@@ -93,48 +407,75 @@ class ConversionWorkflows:
         output_dir: str,
         progress_callback: Optional[Callable[[str, float], None]] = None,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        owner: Optional[str] = None,
     ) -> List[str]:
-        created_pdfs = []
-        total_files = len(ppt_files)
-        expected_outputs: List[str] = []
+        created_indexes: List[int] = []
+        accepted, _rejected = self._preflight_inputs(ppt_files, progress_callback, is_cancelled)
+        ppt_files = [ppt_files[i] for i in accepted]
+        expected_outputs = self._separate_output_paths(ppt_files, output_dir)
+        # Files that were already there belong to an earlier run and are never
+        # removed on cancel, even when this run was about to overwrite them.
+        existing = {i for i, output_path in enumerate(expected_outputs) if os.path.exists(output_path)}
+        started_indexes: Set[int] = set()
+        started_lock = threading.Lock()
 
-        for ppt_file in ppt_files:
-            base_name = os.path.splitext(os.path.basename(ppt_file))[0]
-            output_name = f"{base_name}_converted_pdf.pdf"
-            expected_outputs.append(os.path.join(output_dir, output_name))
+        def on_unit_started(unit: List[int]) -> None:
+            with started_lock:
+                started_indexes.update(unit)
 
         try:
-            for i, ppt_file in enumerate(ppt_files):
-                if is_cancelled and is_cancelled():
-                    raise ConversionCancelledError("Conversion cancelled")
-
-                if progress_callback:
-                    progress_callback(
-                        f"Converting {i + 1}/{total_files}: {os.path.basename(ppt_file)}",
-                        (i / total_files) * 100,
-                    )
+            jobs = list(zip(ppt_files, expected_outputs))
+            converted_units = self._convert_files(
+                jobs,
+                progress_callback,
+                100,
+                self._worker_count(),
+                is_cancelled,
+                on_unit_started=on_unit_started,
+                owner=owner,
+            )
+            with closing(converted_units):
+                for unit in converted_units:
+                    created_indexes.extend(unit)
 
-                output_path = expected_outputs[i]
-                self._convert_single(ppt_file, output_path, is_cancelled)
-                created_pdfs.append(output_path)
-
-                if is_cancelled and is_cancelled():
-                    raise ConversionCancelledError("Conversion cancelled")
+            if is_cancelled and is_cancelled():
+                raise ConversionCancelledError("Conversion cancelled")
 
             if progress_callback:
-                progress_callback("All files converted!", 100)
+                progress_callback(f"All files converted!{self._cache_summary()}{self._skipped_summary()}", 100)
 
-            return created_pdfs
+            return [expected_outputs[i] for i in sorted(created_indexes)]
         except ConversionCancelledError:
-            time.sleep(1.0)
-            for expected_output in expected_outputs:
-                if os.path.exists(expected_output):
+            # The pool only raises once every worker has stopped its backend, so the
+            # outputs written (or half-written) by this run can be removed right away.
+            # Units that already completed keep their PDFs.
+            unfinished = started_indexes.difference(created_indexes, existing)
+            for i in sorted(unfinished):
+                if os.path.exists(expected_outputs[i]):
                     try:
-                        os.remove(expected_output)
+                        os.remove(expected_outputs[i])
                     except OSError:
                         pass
             raise
 
+    def _attempt_output_path(self, output_path: str) -> str:
+        directory, name = os.path.split(output_path)
+        return os.path.join(directory, f".{uuid.uuid4().hex[:8]}-{name}")
+
+    def _separate_output_paths(self, ppt_files: List[str], output_dir: str) -> List[str]:
+        outputs: List[str] = []
+        used_names = set()
+        for ppt_file in ppt_files:
+            base_name = os.path.splitext(os.path.basename(ppt_file))[0]
+            output_name = f"{base_name}_converted_pdf.pdf"
+            suffix = 2
+            while output_name.casefold() in used_names:
+                output_name = f"{base_name}_converted_pdf_{suffix}.pdf"
+                suffix += 1
+            used_names.add(output_name.casefold())
+            outputs.append(os.path.join(output_dir, output_name))
+        return outputs
+
     def cleanup_temp_files(self) -> None:
         for pdf in self.temp_pdfs:
             try:
@@ -1,16 +1,84 @@
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from .backend_converters import BackendConverters
 from .backend_support import BackendSupport
+from .conversion_cache import ConversionCache
+from .conversion_scheduler import ConversionScheduler
+from .conversion_settings import ConversionSettings
 from .conversion_types import ConversionBackend, ConversionCancelledError
 from .conversion_workflows import ConversionWorkflows
+from .metrics import start_metrics_file_writer
+from .preflight import check_presentation
+from .timeout_policy import TimeoutPolicy, shared_timeout_history
+from .tracing import enable_tracing, span
 
 
 class ConversionService:
-    def __init__(self):
-        self._backend_support = BackendSupport()
-        self._backend_converters = BackendConverters(self._backend_support)
-        self._workflows = ConversionWorkflows(self.ppt_to_pdf)
+    def __init__(
+        self,
+        backend_support: Optional[BackendSupport] = None,
+        settings: Optional[ConversionSettings] = None,
+        scheduler: Optional[ConversionScheduler] = None,
+    ):
+        self._settings = settings or ConversionSettings.from_env()
+        if self._settings.trace_path:
+            enable_tracing(self._settings.trace_path, self._settings.trace_max_events)
+        if self._settings.metrics_file:
+            start_metrics_file_writer(self._settings.metrics_file, self._settings.metrics_interval)
+        self._backend_support = backend_support or BackendSupport()
+        timeout_policy = TimeoutPolicy(
+            shared_timeout_history(self._settings.timeout_history_path),
+            floor=self._settings.timeout_floor,
+            ceiling=self._settings.timeout_ceiling,
+        )
+        self._backend_converters = BackendConverters(
+            self._backend_support,
+            timeout_policy,
+            stall_timeout=self._settings.stall_timeout or None,
+        )
+        self._cache: Optional[ConversionCache] = None
+        if self._settings.cache_enabled:
+            self._cache = ConversionCache.for_directory(
+                self._settings.cache_dir,
+                index_dir=self._settings.cache_index_dir,
+                max_bytes=self._settings.cache_max_bytes,
+            )
+        self._workflows = ConversionWorkflows(
+            self.ppt_to_pdf,
+            convert_batch=self.ppt_to_pdf_batch,
+            plan_batches=self.plan_batches,
+            max_workers=self.max_workers,
+            scheduler=scheduler,
+            cache=self._cache,
+            backend_identity=self._backend_support.get_backend_identity,
+            merge_stream_threshold=self._settings.merge_stream_threshold,
+            speculate=self._settings.speculate,
+            preflight=check_presentation if self._settings.preflight else None,
+        )
+
+    @property
+    def backend_support(self) -> BackendSupport:
+        return self._backend_support
+
+    @property
+    def settings(self) -> ConversionSettings:
+        return self._settings
+
+    @property
+    def cache(self) -> Optional[ConversionCache]:
+        return self._cache
+
+    def cache_stats(self) -> Tuple[int, int]:
+        return self._workflows.cache_hits, self._workflows.cache_misses
+
+    def rejected_inputs(self) -> List[Tuple[str, str]]:
+        return list(self._workflows.rejected_inputs)
+
+    def max_workers(self) -> int:
+        backend_limit = self._backend_converters.max_parallelism()
+        if backend_limit is None:
+            return self._settings.max_workers
+        return min(self._settings.max_workers, backend_limit)
 
     def get_available_backends(self) -> List[ConversionBackend]:
         return self._backend_support.get_available_backends()
@@ -29,6 +97,17 @@ class ConversionService:
     ) -> None:
         self._backend_converters.convert(input_path, output_path, is_cancelled)
 
+    def ppt_to_pdf_batch(
+        self,
+        jobs: List[Tuple[str, str]],
+        on_file_started: Optional[Callable[[int], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self._backend_converters.convert_batch(jobs, on_file_started, is_cancelled)
+
+    def plan_batches(self, input_paths: List[str], workers: int = 1) -> List[List[int]]:
+        return self._backend_converters.plan_batches(input_paths, workers)
+
     def merge_pdfs(
         self,
         pdf_list: List[str],
@@ -37,6 +116,21 @@ class ConversionService:
     ) -> None:
         self._workflows.merge_pdfs(pdf_list, output_path, is_cancelled)
 
+    def convert_jobs(
+        self,
+        jobs: List[Tuple[str, str]],
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        owner: Optional[str] = None,
+    ) -> Dict[int, str]:
+        with span("workflow", mode="jobs", files=len(jobs)):
+            return self._workflows.convert_jobs(
+                jobs,
+                progress_callback=progress_callback,
+                is_cancelled=is_cancelled,
+                owner=owner,
+            )
+
     def convert_and_merge(
         self,
         ppt_files: List[str],
@@ -44,14 +138,19 @@ class ConversionService:
         progress_callback: Optional[Callable[[str, float], None]] = None,
         delete_temp: bool = True,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        owner: Optional[str] = None,
+        allow_skipped: bool = True,
     ) -> None:
-        self._workflows.convert_and_merge(
-            ppt_files=ppt_files,
-            output_path=output_path,
-            progress_callback=progress_callback,
-            delete_temp=delete_temp,
-            is_cancelled=is_cancelled,
-        )
+        with span("workflow", mode="merge", files=len(ppt_files)):
+            self._workflows.convert_and_merge(
+                ppt_files=ppt_files,
+                output_path=output_path,
+                progress_callback=progress_callback,
+                delete_temp=delete_temp,
+                is_cancelled=is_cancelled,
+                owner=owner,
+                allow_skipped=allow_skipped,
+            )
 
     def convert_separate(
         self,
@@ -59,17 +158,23 @@ class ConversionService:
         output_dir: str,
         progress_callback: Optional[Callable[[str, float], None]] = None,
         is_cancelled: Optional[Callable[[], bool]] = None,
+        owner: Optional[str] = None,
     ) -> List[str]:
-        return self._workflows.convert_separate(
-            ppt_files=ppt_files,
-            output_dir=output_dir,
-            progress_callback=progress_callback,
-            is_cancelled=is_cancelled,
-        )
+        with span("workflow", mode="separate", files=len(ppt_files)):
+            return self._workflows.convert_separate(
+                ppt_files=ppt_files,
+                output_dir=output_dir,
+                progress_callback=progress_callback,
+                is_cancelled=is_cancelled,
+                owner=owner,
+            )
 
     def cleanup_temp_files(self) -> None:
         self._workflows.cleanup_temp_files()
 
+    def shutdown(self) -> None:
+        self._backend_support.shutdown()
+
 
 __all__ = [
     "ConversionService",
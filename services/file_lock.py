@@ -0,0 +1,86 @@
+import os
+import sys
+import threading
+import time
+from typing import IO, Dict, Optional
+
+
+# Advisory inter-process lock on a lock file. POSIX record locks (lockf) are
+# used rather than flock because they also work on NFS-mounted cache volumes.
+# Record locks are per process, so threads are serialised with a local lock.
+class FileLock:
+    _thread_locks: Dict[str, threading.Lock] = {}
+    _thread_locks_guard = threading.Lock()
+
+    def __init__(self, path: str, shared: bool = False, timeout: Optional[float] = None) -> None:
+        self._path = os.path.abspath(path)
+        self._shared = shared
+        self._timeout = timeout
+        self._handle: Optional[IO[bytes]] = None
+        with self._thread_locks_guard:
+            self._thread_lock = self._thread_locks.setdefault(self._path, threading.Lock())
+
+    def acquire(self) -> None:
+        deadline = None if self._timeout is None else time.time() + self._timeout
+        if not self._thread_lock.acquire(timeout=-1 if self._timeout is None else self._timeout):
+            raise TimeoutError(f"Timed out waiting for lock: {self._path}")
+
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            handle = open(self._path, "a+b")
+        except OSError:
+            self._thread_lock.release()
+            raise
+
+        while True:
+            try:
+                self._lock(handle)
+                break
+            except OSError:
+                if deadline is not None and time.time() > deadline:
+                    handle.close()
+                    self._thread_lock.release()
+                    raise TimeoutError(f"Timed out waiting for lock: {self._path}")
+                time.sleep(0.05)
+        self._handle = handle
+
+    def _lock(self, handle: IO[bytes]) -> None:
+        if sys.platform == "win32":
+            import msvcrt
+
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+
+        import fcntl
+
+        mode = fcntl.LOCK_SH if self._shared else fcntl.LOCK_EX
+        fcntl.lockf(handle.fileno(), mode | fcntl.LOCK_NB)
+
+    def release(self) -> None:
+        handle = self._handle
+        self._handle = None
+        if handle is None:
+            return
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.lockf(handle.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        finally:
+            handle.close()
+            self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
@@ -0,0 +1,267 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .backend_support import BackendSupport
+from .cancellation import CancellationToken
+from .conversion_scheduler import ConversionScheduler
+from .conversion_settings import ConversionSettings
+from .conversion_types import ConversionCancelledError
+from .converter_service import ConversionService
+from .metrics import QUEUED_JOBS
+
+JOB_MODES = ("merge", "separate")
+
+
+class JobQueueFullError(RuntimeError):
+    pass
+
+
+class ConversionJob:
+    def __init__(self, mode: str, inputs: List[str], work_dir: str, allow_skipped: bool = False) -> None:
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.inputs = inputs
+        self.work_dir = work_dir
+        # Merge jobs fail when a deck cannot be converted unless the client
+        # accepts a merged PDF without it.
+        self.allow_skipped = allow_skipped
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = "Queued"
+        self.error: Optional[str] = None
+        self.result_path: Optional[str] = None
+        self.skipped: List[Dict[str, str]] = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_token = CancellationToken()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "status": self.status,
+            "progress": round(self.progress, 2),
+            "message": self.message,
+            "error": self.error,
+            "inputs": len(self.inputs),
+            "skipped": self.skipped,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result_ready": self.status == "done" and self.result_path is not None,
+        }
+
+
+# Runs submitted conversions on a few runner threads. Admission is bounded:
+# once max_pending jobs are waiting, submit() refuses new work instead of
+# queueing it, and every runner shares one scheduler, so the backend never sees
+# more than max_concurrency conversions however many jobs are accepted.
+class JobQueue:
+    def __init__(
+        self,
+        backend_support: Optional[BackendSupport] = None,
+        settings: Optional[ConversionSettings] = None,
+        max_running: int = 2,
+        max_pending: int = 16,
+        max_finished: int = 100,
+        work_root: Optional[str] = None,
+    ) -> None:
+        self._settings = settings or ConversionSettings.from_env()
+        self._scheduler = ConversionScheduler(self._settings.max_concurrency)
+        self._backend_support = backend_support or BackendSupport()
+        self._pending: "queue.Queue[Optional[ConversionJob]]" = queue.Queue(maxsize=max(1, max_pending))
+        self._jobs: "OrderedDict[str, ConversionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_finished = max_finished
+        self._work_root = work_root or tempfile.mkdtemp(prefix="ppt2pdf-jobs-")
+        self._running = 0
+        self._runners = [
+            threading.Thread(target=self._run_jobs, name=f"ppt2pdf-job-runner-{index}", daemon=True)
+            for index in range(max(1, max_running))
+        ]
+        for runner in self._runners:
+            runner.start()
+
+    @property
+    def backend_support(self) -> BackendSupport:
+        return self._backend_support
+
+    @property
+    def scheduler(self) -> ConversionScheduler:
+        return self._scheduler
+
+    def create_work_dir(self) -> str:
+        os.makedirs(self._work_root, exist_ok=True)
+        return tempfile.mkdtemp(prefix="job-", dir=self._work_root)
+
+    def submit(
+        self,
+        mode: str,
+        inputs: List[str],
+        work_dir: Optional[str] = None,
+        allow_skipped: bool = False,
+    ) -> ConversionJob:
+        if mode not in JOB_MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        if not inputs:
+            raise ValueError("No input files given")
+        missing = [path for path in inputs if not os.path.isfile(path)]
+        if missing:
+            raise ValueError(f"Input file(s) not found: {', '.join(missing)}")
+
+        job = ConversionJob(mode, inputs, work_dir or self.create_work_dir(), allow_skipped=allow_skipped)
+        with self._lock:
+            try:
+                self._pending.put_nowait(job)
+            except queue.Full:
+                raise JobQueueFullError("Too many queued jobs, try again later")
+            self._jobs[job.id] = job
+            self._prune_finished()
+        QUEUED_JOBS.set(self._pending.qsize())
+        return job
+
+    # A hint for callers that want to refuse work before preparing it; submit()
+    # still enforces the limit.
+    def is_full(self) -> bool:
+        return self._pending.full()
+
+    def get(self, job_id: str) -> Optional[ConversionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[ConversionJob]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_token.cancel()
+        with self._lock:
+            if job.status == "queued":
+                self._finish(job, "cancelled", "Cancelled")
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queued": sum(1 for job in self._jobs.values() if job.status == "queued"),
+                "running": self._running,
+                "active_conversions": self._scheduler.active_count(),
+                "waiting_conversions": self._scheduler.waiting_count(),
+                "max_concurrency": self._scheduler.max_concurrency,
+            }
+
+    def _finish(self, job: ConversionJob, status: str, message: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.message = message
+        job.error = error
+        job.finished_at = time.time()
+
+    def _prune_finished(self) -> None:
+        finished = [job for job in self._jobs.values() if job.is_finished]
+        for job in finished[: max(0, len(finished) - self._max_finished)]:
+            del self._jobs[job.id]
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    def _run_jobs(self) -> None:
+        while True:
+            job = self._pending.get()
+            QUEUED_JOBS.set(self._pending.qsize())
+            if job is None:
+                return
+            with self._lock:
+                if job.status != "queued":
+                    continue
+                job.status = "running"
+                job.message = "Starting"
+                job.started_at = time.time()
+                self._running += 1
+            try:
+                self._run_job(job)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    def _run_job(self, job: ConversionJob) -> None:
+        def on_progress(message: str, progress: float) -> None:
+            job.message = message
+            job.progress = progress
+
+        service = ConversionService(
+            backend_support=self._backend_support,
+            settings=self._settings,
+            scheduler=self._scheduler,
+        )
+        try:
+            if job.mode == "merge":
+                output_path = os.path.join(job.work_dir, "merged.pdf")
+                service.convert_and_merge(
+                    job.inputs,
+                    output_path,
+                    progress_callback=on_progress,
+                    is_cancelled=job.cancel_token,
+                    owner=job.id,
+                    allow_skipped=job.allow_skipped,
+                )
+                job.result_path = output_path
+            else:
+                output_dir = os.path.join(job.work_dir, "pdfs")
+                os.makedirs(output_dir, exist_ok=True)
+                outputs = service.convert_separate(
+                    job.inputs,
+                    output_dir,
+                    progress_callback=on_progress,
+                    is_cancelled=job.cancel_token,
+                    owner=job.id,
+                )
+                job.result_path = self._zip_outputs(outputs, os.path.join(job.work_dir, "pdfs.zip"))
+                shutil.rmtree(output_dir, ignore_errors=True)
+            if job.cancel_token.is_cancelled():
+                raise ConversionCancelledError("Conversion cancelled")
+            job.skipped = self._skipped(service)
+            with self._lock:
+                self._finish(job, "done", job.message)
+        except ConversionCancelledError:
+            with self._lock:
+                self._finish(job, "cancelled", "Cancelled")
+        except Exception as exc:
+            job.skipped = self._skipped(service)
+            with self._lock:
+                self._finish(job, "failed", "Conversion failed", str(exc))
+
+    def _skipped(self, service: ConversionService) -> List[Dict[str, str]]:
+        return [{"input": os.path.basename(path), "reason": reason} for path, reason in service.rejected_inputs()]
+
+    def _zip_outputs(self, outputs: List[str], zip_path: str) -> str:
+        # PDFs barely compress, so entries are stored and written one file at a time.
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for output in outputs:
+                archive.write(output, os.path.basename(output))
+        return zip_path
+
+    def shutdown(self) -> None:
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+        # Cancelled jobs are skipped by the runners, so the queue drains quickly.
+        for _runner in self._runners:
+            try:
+                self._pending.put(None, timeout=5)
+            except queue.Full:
+                break
+        for runner in self._runners:
+            runner.join(timeout=10)
+        self._backend_support.shutdown()
+        shutil.rmtree(self._work_root, ignore_errors=True)
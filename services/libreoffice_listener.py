@@ -0,0 +1,215 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .cancellation import child_token, wait_for
+from .conversion_types import ConversionCancelledError, ConversionStalledError, ConversionTimeoutError
+from .process_tree import process_group_options, terminate_process_tree
+from .stall_detection import StallWatchdog
+from .tracing import span
+
+
+def load_uno() -> Optional[Any]:
+    try:
+        import uno
+
+        return uno
+    except Exception:
+        return None
+
+
+class LibreOfficeListener:
+    STARTUP_TIMEOUT = 60
+    PDF_FILTER = "impress_pdf_Export"
+
+    def __init__(self, soffice_path: str, profile_dir: Optional[str] = None) -> None:
+        self._soffice_path = soffice_path
+        self._profile_dir = profile_dir
+        self._owns_profile = profile_dir is None
+        self._pipe_name = ""
+        self._process: Optional[subprocess.Popen] = None
+        self._desktop: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_supported() -> bool:
+        return load_uno() is not None
+
+    @property
+    def profile_dir(self) -> Optional[str]:
+        return self._profile_dir
+
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None and self._desktop is not None
+
+    def _start(self) -> None:
+        uno = load_uno()
+        if uno is None:
+            raise RuntimeError("LibreOffice UNO bridge (python3-uno) is not available")
+
+        if self._profile_dir is None:
+            self._profile_dir = tempfile.mkdtemp(prefix="ppt2pdf-lo-profile-")
+
+        self._pipe_name = f"ppt2pdf_{uuid.uuid4().hex}"
+        cmd = [
+            self._soffice_path,
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--norestore",
+            "--nodefault",
+            "--nolockcheck",
+            f"-env:UserInstallation={Path(self._profile_dir).as_uri()}",
+            f"--accept=pipe,name={self._pipe_name};urp;StarOffice.ComponentContext",
+        ]
+        self._process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **process_group_options(),
+        )
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver",
+            local_context,
+        )
+        connect_url = f"uno:pipe,name={self._pipe_name};urp;StarOffice.ComponentContext"
+
+        deadline = time.time() + self.STARTUP_TIMEOUT
+        while True:
+            if self._process.poll() is not None:
+                self._process = None
+                raise RuntimeError("LibreOffice listener exited during startup")
+            try:
+                remote_context = resolver.resolve(connect_url)
+                break
+            except Exception:
+                if time.time() > deadline:
+                    self._kill()
+                    raise RuntimeError("LibreOffice listener did not start in time")
+                time.sleep(0.2)
+
+        self._desktop = remote_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop",
+            remote_context,
+        )
+
+    def _kill(self) -> None:
+        process = self._process
+        self._process = None
+        self._desktop = None
+        if process is None:
+            return
+        # Also runs when the launcher already exited, to clear soffice.bin left in its group.
+        terminate_process_tree(process)
+
+    def _export(self, input_path: str, output_path: str) -> None:
+        uno = load_uno()
+        if uno is None or self._desktop is None:
+            raise RuntimeError("LibreOffice listener is not running")
+
+        from com.sun.star.beans import PropertyValue
+
+        def prop(name: str, value: Any) -> Any:
+            item = PropertyValue()
+            item.Name = name
+            item.Value = value
+            return item
+
+        document = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(input_path)),
+            "_blank",
+            0,
+            (prop("Hidden", True), prop("ReadOnly", True)),
+        )
+        if document is None:
+            raise RuntimeError("LibreOffice could not open the presentation")
+
+        try:
+            document.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                (prop("FilterName", self.PDF_FILTER),),
+            )
+        finally:
+            try:
+                document.close(True)
+            except Exception:
+                pass
+
+    def convert(
+        self,
+        input_path: str,
+        output_path: str,
+        timeout: float,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        stall_timeout: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            if not self.is_running():
+                self._kill()
+                with span("spawn", program="soffice-listener"):
+                    self._start()
+
+            outcome: dict = {}
+
+            def run_export() -> None:
+                try:
+                    self._export(input_path, output_path)
+                except Exception as exc:
+                    outcome["error"] = exc
+
+            export_thread = threading.Thread(target=run_export, daemon=True)
+            export_thread.start()
+
+            token, detach = child_token(is_cancelled)
+            watchdog = None
+            if stall_timeout and self._process is not None:
+                watchdog = StallWatchdog(self._process.pid, stall_timeout, token.cancel).start()
+            try:
+                outcome_kind = wait_for(export_thread.join, token, timeout)
+            finally:
+                if watchdog is not None:
+                    watchdog.stop()
+                detach()
+            if outcome_kind != "done":
+                self._kill()
+                export_thread.join(timeout=5)
+                if watchdog is not None and watchdog.stalled:
+                    raise ConversionStalledError(f"Conversion stalled: no CPU or I/O activity for {stall_timeout:g} s")
+                if outcome_kind == "cancelled":
+                    raise ConversionCancelledError("Conversion cancelled")
+                raise ConversionTimeoutError("Conversion timed out")
+
+            if "error" in outcome:
+                if self._process is None or self._process.poll() is not None:
+                    self._kill()
+                    raise RuntimeError(f"LibreOffice listener crashed during conversion: {outcome['error']}")
+                raise RuntimeError(f"LibreOffice conversion failed: {outcome['error']}")
+
+            if not os.path.exists(output_path):
+                raise RuntimeError("LibreOffice conversion finished but no PDF was generated")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            desktop = self._desktop
+            if desktop is not None and self._process is not None and self._process.poll() is None:
+                try:
+                    desktop.terminate()
+                except Exception:
+                    pass
+                try:
+                    self._process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    pass
+            self._kill()
+
+            if self._owns_profile and self._profile_dir:
+                shutil.rmtree(self._profile_dir, ignore_errors=True)
+                self._profile_dir = None
@@ -0,0 +1,300 @@
+import atexit
+import bisect
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+# Metrics only take a short per-metric lock and update a dict entry, so they
+# are cheap enough to record from every conversion; text rendering happens
+# only when /metrics is scraped or the metrics file is rewritten.
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        self._function = function
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None and not self.labelnames:
+            return self._function()
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        if self._function is not None and not self.labelnames:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: non-cumulative bucket counts, sum, count.
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = ([0] * len(self.buckets), [0.0, 0])
+                self._values[key] = entry
+            entry[0][position] += 1
+            entry[1][0] += value
+            entry[1][1] += 1
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return int(entry[1][1]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), list(totals))) for key, (counts, totals) in self._values.items())
+        lines = []
+        for key, (counts, totals) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(totals[0])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(totals[1])}")
+        return lines
+
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: MetricT) -> MetricT:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+CONVERSIONS_STARTED = REGISTRY.register(
+    Counter("ppt2pdf_conversions_started_total", "Presentations handed to a backend.", ["backend"])
+)
+CONVERSIONS_SUCCEEDED = REGISTRY.register(
+    Counter("ppt2pdf_conversions_succeeded_total", "Presentations converted to PDF.", ["backend"])
+)
+CONVERSIONS_FAILED = REGISTRY.register(
+    Counter("ppt2pdf_conversions_failed_total", "Presentations the backend failed to convert.", ["backend"])
+)
+CONVERSIONS_CANCELLED = REGISTRY.register(
+    Counter("ppt2pdf_conversions_cancelled_total", "Conversions stopped by a cancel request.", ["backend"])
+)
+CONVERSION_TIMEOUTS = REGISTRY.register(
+    Counter("ppt2pdf_conversion_timeouts_total", "Backend runs killed after exceeding their timeout.", ["backend"])
+)
+CONVERSION_SECONDS = REGISTRY.register(
+    Histogram(
+        "ppt2pdf_conversion_duration_seconds",
+        "Wall time of one backend run (a single file or a whole batch).",
+        (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600),
+        ["backend"],
+    )
+)
+MERGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "ppt2pdf_merge_duration_seconds",
+        "Time spent appending PDFs and writing one merged document.",
+        (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300),
+    )
+)
+PDF_PAGES = REGISTRY.register(Counter("ppt2pdf_pdf_pages_total", "Pages written to merged PDFs.", ["stage"]))
+PDF_BYTES = REGISTRY.register(Counter("ppt2pdf_pdf_bytes_total", "Bytes of PDF output produced.", ["stage"]))
+QUEUED_UNITS = REGISTRY.register(
+    Gauge("ppt2pdf_scheduler_waiting_units", "Conversion units waiting for a global scheduler slot.")
+)
+ACTIVE_UNITS = REGISTRY.register(
+    Gauge("ppt2pdf_scheduler_active_units", "Conversion units holding a global scheduler slot.")
+)
+ACTIVE_WORKERS = REGISTRY.register(Gauge("ppt2pdf_active_workers", "Worker threads currently converting."))
+SPECULATIVE_ATTEMPTS = REGISTRY.register(
+    Counter(
+        "ppt2pdf_speculative_attempts_total",
+        "Second attempts of straggling conversion units: started, won or lost to the original attempt.",
+        ["outcome"],
+    )
+)
+QUEUED_JOBS = REGISTRY.register(Gauge("ppt2pdf_jobs_queued", "HTTP service jobs waiting for a runner."))
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def write_metrics_file(path: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(render_metrics())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+# Rewrites a metrics file in the Prometheus text format every ``interval``
+# seconds (for node_exporter's textfile collector or anything that tails it).
+class MetricsFileWriter:
+    def __init__(self, path: str, interval: float = 15.0) -> None:
+        self.path = path
+        self.interval = max(1.0, interval)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ppt2pdf-metrics-writer", daemon=True)
+
+    def start(self) -> "MetricsFileWriter":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while True:
+            try:
+                write_metrics_file(self.path)
+            except OSError:
+                pass
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+        try:
+            write_metrics_file(self.path)
+        except OSError:
+            pass
+
+
+_file_writer: Optional[MetricsFileWriter] = None
+_file_writer_lock = threading.Lock()
+
+
+def start_metrics_file_writer(path: str, interval: float = 15.0) -> MetricsFileWriter:
+    global _file_writer
+    with _file_writer_lock:
+        if _file_writer is None:
+            _file_writer = MetricsFileWriter(path, interval).start()
+            atexit.register(_file_writer.stop)
+        return _file_writer
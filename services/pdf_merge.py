@@ -0,0 +1,344 @@
+import os
+import time
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List, Optional, Tuple
+
+# pypdf takes a noticeable share of startup time, so it is only imported once
+# a merge actually runs.
+if TYPE_CHECKING:
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import IndirectObject, PdfObject
+
+from .metrics import MERGE_SECONDS, PDF_BYTES, PDF_PAGES
+from .tracing import span
+
+# An outline item as (title, destination page id, destination view, children).
+Bookmark = Tuple[str, int, List[Any], List[Any]]
+
+
+def bookmark_title(pdf_path: str, title: Optional[str] = None) -> str:
+    return title or os.path.splitext(os.path.basename(pdf_path))[0]
+
+
+# Writes a merged PDF straight to disk, one input document at a time. Only the
+# current input is parsed and only object offsets, page ids and bookmarks are
+# kept for the whole run, so memory and open files stay flat however many
+# inputs there are. Like PdfWriter.append(outline_item=...), each input gets
+# one top-level bookmark with the input's own outline nested under it.
+class StreamingPdfWriter:
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    OUTLINES_ID = 3
+    # Page attributes a page takes from its /Pages ancestors when it does not
+    # set them itself (PDF 32000-1, 7.7.3.4).
+    INHERITABLE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+    def __init__(self, output_path: str) -> None:
+        self._handle: Optional[BinaryIO] = open(output_path, "wb")
+        self._offsets: Dict[int, int] = {}
+        self._next_id = self.OUTLINES_ID + 1
+        self._page_ids: List[int] = []
+        self._bookmarks: List[Bookmark] = []
+        self._handle.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def _allocate(self) -> int:
+        idnum = self._next_id
+        self._next_id += 1
+        return idnum
+
+    def _write_object(self, idnum: int, obj: "PdfObject") -> None:
+        if self._handle is None:
+            raise RuntimeError("PDF writer is already closed")
+        self._offsets[idnum] = self._handle.tell()
+        self._handle.write(f"{idnum} 0 obj\n".encode())
+        obj.write_to_stream(self._handle)
+        self._handle.write(b"\nendobj\n")
+
+    def append(self, pdf_path: str, title: Optional[str] = None) -> int:
+        from pypdf import PdfReader
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+        with span("parse", file=os.path.basename(pdf_path)):
+            reader = PdfReader(pdf_path)
+            if reader.is_encrypted:
+                raise RuntimeError(f"Cannot merge encrypted PDF: {os.path.basename(pdf_path)}")
+            pages = list(reader.pages)
+
+        new_ids: Dict[Tuple[int, int], int] = {}
+        to_write: List["IndirectObject"] = []
+
+        def reference(indirect: "IndirectObject") -> "IndirectObject":
+            key = (indirect.idnum, indirect.generation)
+            if key not in new_ids:
+                new_ids[key] = self._allocate()
+                to_write.append(indirect)
+            return IndirectObject(new_ids[key], 0, None)
+
+        def remap(value: "PdfObject") -> "PdfObject":
+            if isinstance(value, IndirectObject):
+                return reference(value)
+            # raw_get/list iteration keep references unresolved; plain indexing on
+            # a DictionaryObject would inline the referenced object instead.
+            if isinstance(value, DictionaryObject):
+                for key in list(value.keys()):
+                    value[key] = remap(value.raw_get(key))
+            elif isinstance(value, ArrayObject):
+                for index, item in enumerate(list.__iter__(value)):
+                    value[index] = remap(item)
+            return value
+
+        # Remapped values of attributes set on /Pages nodes, shared by every page
+        # under that node.
+        inherited: Dict[Tuple[int, int, str], "PdfObject"] = {}
+
+        # Pages are re-parented under one flat /Pages node, so attributes they
+        # inherit from the input's page tree are copied onto them first.
+        def inherit(page: "DictionaryObject", parent: Optional["PdfObject"]) -> None:
+            seen = set()
+            while isinstance(parent, IndirectObject):
+                parent_key = (parent.idnum, parent.generation)
+                node = parent.get_object()
+                if parent_key in seen or not isinstance(node, DictionaryObject):
+                    return
+                seen.add(parent_key)
+                for name in self.INHERITABLE_ATTRIBUTES:
+                    if name in page or name not in node:
+                        continue
+                    cache_key = (parent.idnum, parent.generation, name)
+                    if cache_key not in inherited:
+                        inherited[cache_key] = remap(node.raw_get(name))
+                    page[NameObject(name)] = inherited[cache_key]
+                parent = node.raw_get("/Parent") if "/Parent" in node else None
+
+        page_keys = set()
+        input_page_ids: List[Optional[int]] = []
+        for page in pages:
+            page_ref = page.indirect_reference
+            if page_ref is None:
+                input_page_ids.append(None)
+                continue
+            page_id = reference(page_ref).idnum
+            page_keys.add((page_ref.idnum, page_ref.generation))
+            self._page_ids.append(page_id)
+            input_page_ids.append(page_id)
+        first_page_id = next((page_id for page_id in input_page_ids if page_id is not None), None)
+        # Read before the objects below are rewritten in place.
+        outline = self._read_outline(reader, input_page_ids)
+
+        # Objects are written depth-first as they are discovered; the reader's
+        # cached copies are rewritten in place, which is fine because the reader
+        # is thrown away once this document is done.
+        while to_write:
+            indirect = to_write.pop()
+            key = (indirect.idnum, indirect.generation)
+            obj = indirect.get_object()
+            if obj is None:
+                continue
+            if key in page_keys and isinstance(obj, DictionaryObject):
+                parent = obj.pop(NameObject("/Parent"), None)
+                remap(obj)
+                inherit(obj, parent)
+                obj[NameObject("/Parent")] = IndirectObject(self.PAGES_ID, 0, None)
+            else:
+                obj = remap(obj)
+            self._write_object(new_ids[key], obj)
+
+        if first_page_id is not None:
+            self._bookmarks.append((bookmark_title(pdf_path, title), first_page_id, [NameObject("/Fit")], outline))
+        return len(page_keys)
+
+    # The input's outline with destinations resolved (named destinations and
+    # GoTo actions included) to the new page ids. Items pointing outside the
+    # input are dropped and their children move up a level.
+    def _read_outline(self, reader: "PdfReader", page_ids: List[Optional[int]]) -> List[Bookmark]:
+        try:
+            items = reader.outline
+        except Exception:
+            return []
+
+        def convert(entries: List[Any]) -> List[Bookmark]:
+            bookmarks: List[Bookmark] = []
+            for position, entry in enumerate(entries):
+                if isinstance(entry, list):
+                    continue
+                # pypdf lists an item's children right after it, as a nested list.
+                following = entries[position + 1] if position + 1 < len(entries) else None
+                nested = convert(following) if isinstance(following, list) else []
+                try:
+                    number = reader.get_destination_page_number(entry)
+                except Exception:
+                    number = None
+                page_id = page_ids[number] if number is not None and 0 <= number < len(page_ids) else None
+                if page_id is None:
+                    bookmarks.extend(nested)
+                    continue
+                view = list(list.__iter__(entry.dest_array))[1:]
+                bookmarks.append((str(entry.title or ""), page_id, view, nested))
+            return bookmarks
+
+        return convert(items)
+
+    def close(self) -> None:
+        if self._handle is None:
+            return
+
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, TextStringObject
+
+        # Writes one level of the tree and returns its first and last item ids
+        # and the number of visible items (every item is open).
+        def write_items(bookmarks: List[Bookmark], parent_id: int) -> Tuple[int, int, int]:
+            item_ids = [self._allocate() for _ in bookmarks]
+            visible = len(bookmarks)
+            for position, ((title, page_id, view, children), item_id) in enumerate(zip(bookmarks, item_ids)):
+                item = DictionaryObject({
+                    NameObject("/Title"): TextStringObject(title),
+                    NameObject("/Parent"): IndirectObject(parent_id, 0, None),
+                    NameObject("/Dest"): ArrayObject([IndirectObject(page_id, 0, None), *view]),
+                })
+                if position > 0:
+                    item[NameObject("/Prev")] = IndirectObject(item_ids[position - 1], 0, None)
+                if position < len(item_ids) - 1:
+                    item[NameObject("/Next")] = IndirectObject(item_ids[position + 1], 0, None)
+                if children:
+                    first, last, count = write_items(children, item_id)
+                    item[NameObject("/First")] = IndirectObject(first, 0, None)
+                    item[NameObject("/Last")] = IndirectObject(last, 0, None)
+                    item[NameObject("/Count")] = NumberObject(count)
+                    visible += count
+                self._write_object(item_id, item)
+            return item_ids[0], item_ids[-1], visible
+
+        outlines = DictionaryObject({NameObject("/Type"): NameObject("/Outlines")})
+        if self._bookmarks:
+            first, last, count = write_items(self._bookmarks, self.OUTLINES_ID)
+            outlines[NameObject("/First")] = IndirectObject(first, 0, None)
+            outlines[NameObject("/Last")] = IndirectObject(last, 0, None)
+            outlines[NameObject("/Count")] = NumberObject(count)
+        self._write_object(self.OUTLINES_ID, outlines)
+
+        self._write_object(self.PAGES_ID, DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject([IndirectObject(page_id, 0, None) for page_id in self._page_ids]),
+            NameObject("/Count"): NumberObject(len(self._page_ids)),
+        }))
+        self._write_object(self.CATALOG_ID, DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(self.PAGES_ID, 0, None),
+            NameObject("/Outlines"): IndirectObject(self.OUTLINES_ID, 0, None),
+        }))
+
+        handle = self._handle
+        xref_offset = handle.tell()
+        handle.write(f"xref\n0 {self._next_id}\n".encode())
+        handle.write(b"0000000000 65535 f \n")
+        for idnum in range(1, self._next_id):
+            offset = self._offsets.get(idnum)
+            if offset is None:
+                handle.write(b"0000000000 65535 f \n")
+            else:
+                handle.write(f"{offset:010d} 00000 n \n".encode())
+        handle.write(
+            f"trailer\n<< /Size {self._next_id} /Root {self.CATALOG_ID} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n".encode()
+        )
+        handle.close()
+        self._handle = None
+
+    def abort(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+# Appends PDFs to a single output in list order while they arrive in any order.
+# Out-of-order arrivals wait in a small buffer until the gap before them closes.
+# Above ``stream_threshold`` inputs the bounded-memory StreamingPdfWriter is used.
+class OrderedPdfMerger:
+    def __init__(self, total: int, output_path: str, stream_threshold: Optional[int] = None) -> None:
+        self._total = total
+        self._output_path = output_path
+        self._pending: Dict[int, Tuple[str, Optional[str]]] = {}
+        self._next_index = 0
+        self._writer: Optional["PdfWriter"] = None
+        self._stream_writer: Optional[StreamingPdfWriter] = None
+        self._stream_path = f"{output_path}.part"
+        self._closed = False
+        self._page_count = 0
+        # Time spent appending and writing, reported as one merge latency sample.
+        self._busy_seconds = 0.0
+
+        if stream_threshold is not None and total > stream_threshold:
+            self._stream_writer = StreamingPdfWriter(self._stream_path)
+        else:
+            from pypdf import PdfWriter
+
+            self._writer = PdfWriter()
+
+    @property
+    def appended_count(self) -> int:
+        return self._next_index
+
+    @property
+    def is_complete(self) -> bool:
+        return self._next_index >= self._total
+
+    @property
+    def page_count(self) -> int:
+        return self._page_count
+
+    @property
+    def is_streaming(self) -> bool:
+        return self._stream_writer is not None
+
+    def add(self, index: int, pdf_path: str, title: Optional[str] = None) -> int:
+        if self._closed:
+            raise RuntimeError("PDF merger is already closed")
+
+        self._pending[index] = (pdf_path, title)
+        while self._next_index in self._pending:
+            path, path_title = self._pending.pop(self._next_index)
+            started = time.perf_counter()
+            with span("merge", file=os.path.basename(path), index=self._next_index):
+                if self._stream_writer is not None:
+                    self._page_count += self._stream_writer.append(path, path_title)
+                elif self._writer is not None:
+                    pages_before = len(self._writer.pages)
+                    self._writer.append(path, outline_item=bookmark_title(path, path_title))
+                    self._page_count += len(self._writer.pages) - pages_before
+            self._busy_seconds += time.perf_counter() - started
+            self._next_index += 1
+        return self._next_index
+
+    def write(self) -> None:
+        if self._closed:
+            raise RuntimeError("PDF merger is already closed")
+        if not self.is_complete:
+            raise RuntimeError(f"Cannot write merged PDF: {self._total - self._next_index} input(s) missing")
+
+        started = time.perf_counter()
+        with span("write", inputs=self._total, streaming=self.is_streaming):
+            if self._stream_writer is not None:
+                self._stream_writer.close()
+                self._stream_writer = None
+                os.replace(self._stream_path, self._output_path)
+            elif self._writer is not None:
+                self._writer.write(self._output_path)
+
+        MERGE_SECONDS.observe(self._busy_seconds + time.perf_counter() - started)
+        PDF_PAGES.inc(self._page_count, stage="merged")
+        try:
+            PDF_BYTES.inc(os.path.getsize(self._output_path), stage="merged")
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._stream_writer is not None:
+            self._stream_writer.abort()
+            self._stream_writer = None
+            try:
+                os.remove(self._stream_path)
+            except OSError:
+                pass
@@ -0,0 +1,155 @@
+import struct
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+PRESENTATION_PART = "ppt/presentation.xml"
+
+# Parts that identify other OOXML / OpenDocument files renamed to .pptx.
+_OTHER_ZIP_FORMATS = (
+    ("word/document.xml", "a Word document"),
+    ("xl/workbook.xml", "an Excel workbook"),
+    ("content.xml", "an OpenDocument file"),
+)
+# Streams that identify other OLE compound files renamed to .ppt.
+_OTHER_OLE_FORMATS = (
+    ("WordDocument", "a Word document"),
+    ("Workbook", "an Excel workbook"),
+    ("Book", "an Excel workbook"),
+)
+_OTHER_SIGNATURES = (
+    (b"%PDF", "a PDF file"),
+    (b"{\\rtf", "an RTF document"),
+    (b"<", "an XML or HTML file"),
+)
+
+_END_OF_CHAIN = 0xFFFFFFFE
+_MAX_CHAIN = 1 << 16
+
+
+# Cheap checks run before a backend is launched for a file. A corrupt, empty,
+# truncated, encrypted or mislabeled file otherwise costs a full backend start
+# and often a timeout before it fails. Only the first bytes, the zip central
+# directory and ppt/presentation.xml (or the OLE header and directory) are
+# read. Returns the reason the file cannot be converted, or None.
+def check_presentation(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as handle:
+            header = handle.read(len(OLE_SIGNATURE))
+            if not header:
+                return "the file is empty"
+            if header.startswith(b"PK"):
+                return _check_zip(handle)
+            if header == OLE_SIGNATURE:
+                return _check_ole(handle)
+    except OSError as exc:
+        return f"the file cannot be read ({exc.strerror or exc})"
+
+    for signature, description in _OTHER_SIGNATURES:
+        if header.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(signature):
+            return f"the file is {description}, not a presentation"
+    return "the file is not a PowerPoint presentation"
+
+
+def _check_zip(handle: BinaryIO) -> Optional[str]:
+    try:
+        archive = zipfile.ZipFile(handle)
+    except (zipfile.BadZipFile, EOFError):
+        return "the file is damaged or truncated (zip central directory not found)"
+
+    with archive:
+        names = set(archive.namelist())
+        if PRESENTATION_PART not in names:
+            for part, description in _OTHER_ZIP_FORMATS:
+                if part in names:
+                    return f"the file is {description}, not a presentation"
+            return f"the zip archive has no {PRESENTATION_PART}"
+        info = archive.getinfo(PRESENTATION_PART)
+        if info.flag_bits & 0x1:
+            return "the file is password-protected"
+        # Reading the part checks its CRC, which catches damage inside the
+        # archive that the central directory alone does not show.
+        try:
+            content = archive.read(info)
+        except (zipfile.BadZipFile, EOFError, zlib.error, NotImplementedError, RuntimeError) as exc:
+            return f"the file is damaged ({exc})"
+
+    if b"presentation" not in content[:4096]:
+        return f"{PRESENTATION_PART} is damaged"
+    return None
+
+
+def _check_ole(handle: BinaryIO) -> Optional[str]:
+    try:
+        streams = _ole_stream_names(handle)
+    except (ValueError, struct.error):
+        return "the file is damaged (invalid compound file structure)"
+
+    # Password-protected .pptx files are stored as an OLE container holding
+    # the encrypted zip package.
+    if "EncryptedPackage" in streams:
+        return "the file is password-protected"
+    if "PowerPoint Document" in streams:
+        return None
+    for stream, description in _OTHER_OLE_FORMATS:
+        if stream in streams:
+            return f"the file is {description}, not a presentation"
+    return "the compound file has no PowerPoint document"
+
+
+# Names of the entries in an OLE compound file's directory (MS-CFB), read by
+# following the directory's sector chain through the FAT. Only the FAT
+# sectors on that chain are loaded.
+def _ole_stream_names(handle: BinaryIO) -> List[str]:
+    handle.seek(0)
+    header = handle.read(512)
+    if len(header) < 512:
+        raise ValueError("truncated header")
+    sector_shift = struct.unpack_from("<H", header, 30)[0]
+    if sector_shift not in (9, 12):
+        raise ValueError("unsupported sector size")
+    sector_size = 1 << sector_shift
+    entries_per_sector = sector_size // 4
+    fat_sector_count, first_directory = struct.unpack_from("<II", header, 44)
+    first_difat, difat_count = struct.unpack_from("<II", header, 68)
+    difat = list(struct.unpack_from("<109I", header, 76))
+
+    def read_sector(sector: int) -> bytes:
+        handle.seek((sector + 1) * sector_size)
+        data = handle.read(sector_size)
+        if len(data) < sector_size:
+            raise ValueError("truncated sector")
+        return data
+
+    difat_sector = first_difat
+    for _ in range(difat_count):
+        if difat_sector >= _END_OF_CHAIN:
+            break
+        values = struct.unpack(f"<{entries_per_sector}I", read_sector(difat_sector))
+        difat.extend(values[:-1])
+        difat_sector = values[-1]
+    difat = difat[:fat_sector_count]
+
+    fat_cache: Dict[int, Tuple[int, ...]] = {}
+
+    def next_sector(sector: int) -> int:
+        fat_index = sector // entries_per_sector
+        if fat_index >= len(difat):
+            raise ValueError("sector outside the FAT")
+        if fat_index not in fat_cache:
+            fat_cache[fat_index] = struct.unpack(f"<{entries_per_sector}I", read_sector(difat[fat_index]))
+        return fat_cache[fat_index][sector % entries_per_sector]
+
+    names: List[str] = []
+    sector = first_directory
+    for _ in range(_MAX_CHAIN):
+        if sector >= _END_OF_CHAIN:
+            return names
+        data = read_sector(sector)
+        for offset in range(0, sector_size, 128):
+            name_length, entry_type = struct.unpack_from("<HB", data, offset + 64)
+            if entry_type in (1, 2, 5) and 2 <= name_length <= 64:
+                names.append(data[offset:offset + name_length - 2].decode("utf-16-le", "replace"))
+        sector = next_sector(sector)
+    raise ValueError("directory chain does not end")
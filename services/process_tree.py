@@ -0,0 +1,124 @@
+import os
+import signal
+import subprocess
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+# soffice is a launcher that forks soffice.bin (through oosplash on Linux), so
+# killing the launcher alone leaves the real office process running. Backend
+# children are started as the leader of their own session / process group so
+# the whole tree can be signalled at once.
+def process_group_options() -> Dict[str, Any]:
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _signal_group(pid: int, sig: int) -> None:
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _taskkill_tree(pid: int) -> None:
+    try:
+        subprocess.run(
+            ["taskkill", "/PID", str(pid), "/T", "/F"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+
+def terminate_process_tree(process: subprocess.Popen, grace: float = 5.0) -> None:
+    if sys.platform == "win32":
+        if process.poll() is None:
+            _taskkill_tree(process.pid)
+        try:
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait(timeout=grace)
+        return
+
+    _signal_group(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+    # The launcher may exit on SIGTERM while soffice.bin lingers in the group.
+    _signal_group(process.pid, signal.SIGKILL)
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def kill_process_tree(pid: int) -> None:
+    if sys.platform == "win32":
+        _taskkill_tree(pid)
+        return
+    try:
+        pgid = os.getpgid(pid)
+    except ProcessLookupError:
+        return
+    if pgid == pid:
+        _signal_group(pid, signal.SIGKILL)
+        return
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def is_pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if sys.platform == "win32":
+        import ctypes
+
+        process_query_limited_information = 0x1000
+        still_active = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return False
+            return exit_code.value == still_active
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Linux only: yields (pid, arguments) for every other process that can be
+# read. Other platforms have no cheap equivalent without extra dependencies and
+# yield nothing.
+def iter_process_arguments() -> Iterator[Tuple[int, List[str]]]:
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return
+    own_pid = os.getpid()
+    for entry in entries:
+        if not entry.isdigit() or int(entry) == own_pid:
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as handle:
+                cmdline = handle.read()
+        except OSError:
+            continue
+        if cmdline:
+            yield int(entry), cmdline.decode("utf-8", "replace").rstrip("\0").split("\0")
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+try:
+    _CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):
+    _CLOCK_TICKS = 100
+
+
+# Linux only: (CPU ticks, bytes read + written) summed over every live process
+# in the process group, or None when /proc is not available. Backend children
+# lead their own group (see process_group_options), so this covers soffice.bin
+# and any helper the launcher forked.
+def process_group_activity(pgid: int) -> Optional[Tuple[int, int]]:
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    cpu_ticks = 0
+    io_bytes = 0
+    found = False
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as handle:
+                stat = handle.read()
+        except OSError:
+            continue
+        # The command name is in parentheses and may contain spaces.
+        fields = stat[stat.rfind(b")") + 2:].split()
+        if len(fields) < 13 or int(fields[2]) != pgid:
+            continue
+        found = True
+        cpu_ticks += int(fields[11]) + int(fields[12])
+        try:
+            with open(f"/proc/{entry}/io", "rb") as handle:
+                for line in handle:
+                    if line.startswith((b"rchar:", b"wchar:")):
+                        io_bytes += int(line.split()[1])
+        except OSError:
+            pass
+    if not found:
+        return None
+    return cpu_ticks, io_bytes
+
+
+# Watches a backend's process group while it converts and calls on_stall once
+# when the group has made no progress for idle_window seconds. Progress is CPU
+# use above MIN_CPU_FRACTION of a core or at least MIN_IO_BYTES of reads and
+# writes between samples. A process stuck on a dialog or a deadlock burns
+# almost nothing, while one working through a huge deck keeps a core busy.
+# Does nothing where /proc is not available.
+class StallWatchdog:
+    MIN_CPU_FRACTION = 0.01
+    MIN_IO_BYTES = 64 * 1024
+    MAX_INTERVAL = 1.0
+
+    def __init__(self, pgid: int, idle_window: float, on_stall: Callable[[], None]) -> None:
+        self.pgid = pgid
+        self.idle_window = idle_window
+        self.stalled = False
+        self._on_stall = on_stall
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StallWatchdog":
+        if process_group_activity(self.pgid) is not None:
+            self._thread = threading.Thread(target=self._run, name="ppt2pdf-stall-watchdog", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        interval = min(self.MAX_INTERVAL, self.idle_window / 4)
+        previous = process_group_activity(self.pgid)
+        previous_at = time.monotonic()
+        last_progress = previous_at
+        while not self._stopped.wait(interval):
+            current = process_group_activity(self.pgid)
+            now = time.monotonic()
+            if current is None or previous is None:
+                return
+            cpu_needed = max(1.0, (now - previous_at) * _CLOCK_TICKS * self.MIN_CPU_FRACTION)
+            if current[0] - previous[0] >= cpu_needed or current[1] - previous[1] >= self.MIN_IO_BYTES:
+                last_progress = now
+            elif now - last_progress >= self.idle_window:
+                self.stalled = True
+                self._on_stall()
+                return
+            previous, previous_at = current, now
@@ -0,0 +1,185 @@
+import atexit
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+_SLIDE_ENTRY = re.compile(r"^ppt/slides/slide\d+\.xml$")
+
+# (work units, seconds) of one successful backend run.
+Sample = Tuple[float, float]
+
+
+def count_slides(input_path: str) -> Optional[int]:
+    # Only the zip central directory is read; legacy binary .ppt files return None.
+    try:
+        with zipfile.ZipFile(input_path) as archive:
+            return sum(1 for name in archive.namelist() if _SLIDE_ENTRY.match(name))
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+
+# Durations of past conversions per backend, persisted so timeouts adapt to
+# this machine across launches. Writes are batched: at most one every
+# SAVE_INTERVAL seconds, plus one at exit.
+class TimeoutHistory:
+    MAX_SAMPLES = 100
+    SAVE_INTERVAL = 5.0
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[Sample]] = self._load()
+        self._dirty = False
+        self._last_save = 0.0
+        self._exit_registered = False
+
+    def _load(self) -> Dict[str, List[Sample]]:
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        samples: Dict[str, List[Sample]] = {}
+        if isinstance(data, dict):
+            for backend, entries in data.items():
+                try:
+                    samples[backend] = [(float(units), float(seconds)) for units, seconds in entries][-self.MAX_SAMPLES:]
+                except (TypeError, ValueError):
+                    continue
+        return samples
+
+    def samples(self, backend: str) -> List[Sample]:
+        with self._lock:
+            return list(self._samples.get(backend, ()))
+
+    def record(self, backend: str, units: float, seconds: float) -> None:
+        with self._lock:
+            entries = self._samples.setdefault(backend, [])
+            entries.append((round(units, 2), round(seconds, 3)))
+            del entries[: -self.MAX_SAMPLES]
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= self.SAVE_INTERVAL
+            if self.path and not self._exit_registered:
+                self._exit_registered = True
+                atexit.register(self.flush)
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {backend: [list(sample) for sample in entries] for backend, entries in self._samples.items()}
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".timeouts-", suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(snapshot, handle)
+            os.replace(temp_path, self.path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+_histories: Dict[Optional[str], TimeoutHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def shared_timeout_history(path: Optional[str]) -> TimeoutHistory:
+    with _histories_lock:
+        history = _histories.get(path)
+        if history is None:
+            history = TimeoutHistory(path)
+            _histories[path] = history
+        return history
+
+
+# Estimates how long a backend run should take and allows a multiple of that.
+# A run's work is its slide count plus a weight per MB (embedded media makes
+# large files slower than their slide count suggests). Expected seconds are
+# startup + per_unit * work, fitted by least squares on this machine's history
+# once there are enough samples, and clamped to [floor, ceiling]. The fitted
+# per_unit is never below min(mean seconds per unit, DEFAULT_PER_UNIT), so
+# noisy history cannot fold all the time into startup, and runs more than
+# MAX_EXTRAPOLATION times larger than any sample also get at least the
+# default model.
+class TimeoutPolicy:
+    DEFAULT_STARTUP = 20.0
+    DEFAULT_PER_UNIT = 0.5
+    UNITS_PER_MB = 2.0
+    # Guess for files whose slides cannot be counted (binary .ppt).
+    SLIDES_PER_MB = 5.0
+    SAFETY_FACTOR = 3.0
+    MIN_SAMPLES = 5
+    MAX_EXTRAPOLATION = 4.0
+
+    def __init__(self, history: Optional[TimeoutHistory] = None, floor: float = 60.0, ceiling: float = 1800.0) -> None:
+        self._history = history or TimeoutHistory()
+        self.floor = max(1.0, floor)
+        self.ceiling = max(self.floor, ceiling)
+
+    def work_units(self, input_paths: List[str]) -> float:
+        total = 0.0
+        for input_path in input_paths:
+            try:
+                size_mb = os.path.getsize(input_path) / (1024 * 1024)
+            except OSError:
+                size_mb = 0.0
+            slides = count_slides(input_path)
+            if slides is None:
+                slides = self.SLIDES_PER_MB * size_mb
+            total += max(1.0, slides + self.UNITS_PER_MB * size_mb)
+        return total
+
+    def _model(self, backend: str, units: float) -> Tuple[float, float]:
+        samples = self._history.samples(backend)
+        if len(samples) < self.MIN_SAMPLES:
+            return self.DEFAULT_STARTUP, self.DEFAULT_PER_UNIT
+
+        count = len(samples)
+        mean_units = sum(sample_units for sample_units, _ in samples) / count
+        mean_seconds = sum(seconds for _, seconds in samples) / count
+        # Seconds per unit including startup, an upper estimate of the slope.
+        mean_ratio = mean_seconds / max(mean_units, 1.0)
+        spread = sum((sample_units - mean_units) ** 2 for sample_units, _ in samples)
+        if spread <= 0:
+            startup, per_unit = 0.0, mean_ratio
+        else:
+            slope = sum(
+                (sample_units - mean_units) * (seconds - mean_seconds) for sample_units, seconds in samples
+            ) / spread
+            # The intercept comes from the fit itself, so the bound only ever
+            # raises the estimate.
+            startup = max(0.0, mean_seconds - slope * mean_units)
+            per_unit = max(slope, min(mean_ratio, self.DEFAULT_PER_UNIT))
+
+        largest = max(sample_units for sample_units, _ in samples)
+        if units > self.MAX_EXTRAPOLATION * max(largest, 1.0):
+            return max(startup, self.DEFAULT_STARTUP), max(per_unit, self.DEFAULT_PER_UNIT)
+        return startup, per_unit
+
+    def timeout_for(self, backend: str, units: float) -> float:
+        startup, per_unit = self._model(backend, units)
+        expected = startup + per_unit * units
+        return min(self.ceiling, max(self.floor, expected * self.SAFETY_FACTOR))
+
+    def record(self, backend: str, units: float, seconds: float) -> None:
+        self._history.record(backend, units, seconds)
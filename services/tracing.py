@@ -0,0 +1,140 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+MAX_EVENTS = 100_000
+
+
+# Collects complete ("X") events in the Chrome trace event format, which loads
+# directly in chrome://tracing and ui.perfetto.dev. Timestamps come from
+# perf_counter and are stored relative to the tracer's creation. Only the
+# latest max_events are kept, so tracing a long-running service stays bounded;
+# the export notes how many older events were dropped.
+class Tracer:
+    def __init__(self, output_path: Optional[str] = None, max_events: int = MAX_EVENTS) -> None:
+        self.output_path = output_path
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max(1, max_events))
+        self._dropped = 0
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def _micros(self, value: float) -> float:
+        return round((value - self._origin) * 1_000_000, 1)
+
+    def record(self, name: str, start: float, end: float, **args: Any) -> None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": "ppt2pdf",
+            "ph": "X",
+            "ts": self._micros(start),
+            "dur": round(max(0.0, end - start) * 1_000_000, 1),
+            "pid": self._pid,
+            "tid": thread.ident or 0,
+            "args": args,
+        }
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self._dropped += 1
+            self._events.append(event)
+            self._thread_names.setdefault(thread.ident or 0, thread.name)
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as exc:
+            args["error"] = type(exc).__name__
+            raise
+        finally:
+            self.record(name, start, time.perf_counter(), **args)
+
+    def events(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self._thread_names.items()
+            ]
+            return metadata + list(self._events)
+
+    def set_max_events(self, max_events: int) -> None:
+        with self._lock:
+            max_events = max(1, max_events)
+            self._dropped += max(0, len(self._events) - max_events)
+            self._events = deque(self._events, maxlen=max_events)
+
+    def export(self, output_path: Optional[str] = None) -> Optional[str]:
+        path = output_path or self.output_path
+        if not path:
+            return None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(
+                {"traceEvents": self.events(), "displayTimeUnit": "ms", "otherData": {"dropped_events": self._dropped}},
+                handle,
+            )
+        os.replace(temp_path, path)
+        return path
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def _export_at_exit() -> None:
+    tracer = _tracer
+    if tracer is not None:
+        try:
+            tracer.export()
+        except OSError:
+            pass
+
+
+def enable_tracing(output_path: Optional[str] = None, max_events: Optional[int] = None) -> Tracer:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(output_path, max_events or MAX_EVENTS)
+            atexit.register(_export_at_exit)
+        else:
+            if output_path:
+                _tracer.output_path = output_path
+            if max_events:
+                _tracer.set_max_events(max_events)
+        return _tracer
+
+
+def disable_tracing() -> None:
+    global _tracer
+    with _tracer_lock:
+        _tracer = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+    tracer = _tracer
+    if tracer is None:
+        yield args
+        return
+    with tracer.span(name, **args) as span_args:
+        yield span_args
+
+
+def record_span(name: str, start: float, end: float, **args: Any) -> None:
+    tracer = _tracer
+    if tracer is not None:
+        tracer.record(name, start, end, **args)
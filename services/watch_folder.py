@@ -0,0 +1,210 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .cancellation import CancellationToken, cancellation_token
+from .conversion_types import ConversionCancelledError
+from .converter_service import ConversionService
+
+# (mtime_ns, size, inode) of a source file as last seen by a scan.
+StatSignature = Tuple[int, int, int]
+
+PRESENTATION_EXTENSIONS = (".ppt", ".pptx")
+
+
+class FolderWatcher:
+    INDEX_NAME = ".ppt2pdf-watch-index.json"
+    INDEX_VERSION = 1
+
+    def __init__(
+        self,
+        service: ConversionService,
+        source_dir: str,
+        output_dir: str,
+        poll_interval: float = 2.0,
+        settle_time: float = 2.0,
+        on_event: Optional[Callable[..., None]] = None,
+    ) -> None:
+        self._service = service
+        self._source_dir = os.path.abspath(source_dir)
+        self._output_dir = os.path.abspath(output_dir)
+        self._poll_interval = poll_interval
+        self._settle_time = settle_time
+        self._on_event = on_event
+        self._index_path = os.path.join(self._output_dir, self.INDEX_NAME)
+        # Signatures of the last conversion attempt per relative path; "error" is
+        # kept for failed decks so they are only retried once they change again.
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Tuple[StatSignature, float]] = {}
+        self._load_index()
+
+    @property
+    def index_path(self) -> str:
+        return self._index_path
+
+    def _emit(self, event: str, **fields: Any) -> None:
+        if self._on_event:
+            self._on_event(event, **fields)
+
+    def _load_index(self) -> None:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == self.INDEX_VERSION and data.get("source") == self._source_dir:
+            self._index = data.get("files", {})
+
+    def _save_index(self) -> None:
+        os.makedirs(self._output_dir, exist_ok=True)
+        data = {"version": self.INDEX_VERSION, "source": self._source_dir, "files": self._index}
+        fd, temp_path = tempfile.mkstemp(dir=self._output_dir, prefix=".watch-index-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(temp_path, self._index_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def _iter_presentations(self) -> Iterator[Tuple[str, StatSignature]]:
+        # scandir hands out cached type information and a single stat per entry,
+        # so a rescan never opens files and stays cheap for very large folders.
+        stack = [self._source_dir]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith((".", "~$")):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if os.path.abspath(entry.path) != self._output_dir:
+                            stack.append(entry.path)
+                        continue
+                    if not entry.name.lower().endswith(PRESENTATION_EXTENSIONS) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    inode = entry.inode()
+                except OSError:
+                    continue
+                relative = os.path.relpath(entry.path, self._source_dir)
+                yield relative, (stat.st_mtime_ns, stat.st_size, inode)
+
+    def _output_name(self, relative_path: str) -> str:
+        known = self._index.get(relative_path)
+        if known is not None and known.get("output"):
+            return str(known["output"])
+        return os.path.splitext(relative_path)[0] + ".pdf"
+
+    def output_path_for(self, relative_path: str) -> str:
+        return os.path.join(self._output_dir, self._output_name(relative_path))
+
+    # x.ppt and x.pptx in one folder would both map to x.pdf. The deck converted
+    # first keeps the plain name and later ones keep their extension
+    # (x.pptx.pdf). Names are recorded in the index, so they do not change
+    # between scans or restarts.
+    def _assign_outputs(self, relative_paths: List[str]) -> Dict[str, str]:
+        owners: Dict[str, str] = {}
+        for relative in sorted(self._index):
+            owners.setdefault(self._output_name(relative).casefold(), relative)
+        assigned: Dict[str, str] = {}
+        for relative in relative_paths:
+            name = self._output_name(relative)
+            if owners.get(name.casefold(), relative) != relative:
+                name = f"{relative}.pdf"
+                suffix = 2
+                while owners.get(name.casefold(), relative) != relative:
+                    name = f"{relative} ({suffix}).pdf"
+                    suffix += 1
+            owners[name.casefold()] = relative
+            assigned[relative] = name
+        return assigned
+
+    def scan(self) -> List[Tuple[str, StatSignature]]:
+        now = time.monotonic()
+        seen = set()
+        ready: List[Tuple[str, StatSignature]] = []
+
+        for relative, signature in self._iter_presentations():
+            seen.add(relative)
+            known = self._index.get(relative)
+            if known is not None and tuple(known["stat"]) == signature:
+                self._pending.pop(relative, None)
+                continue
+
+            # A file is only picked up once its size and mtime have stopped moving
+            # for settle_time, so decks that are still being copied are skipped.
+            pending = self._pending.get(relative)
+            if pending is None or pending[0] != signature:
+                self._pending[relative] = (signature, now)
+                continue
+            if now - pending[1] >= self._settle_time:
+                ready.append((relative, signature))
+
+        for relative in list(self._pending):
+            if relative not in seen:
+                del self._pending[relative]
+        # Deleting a deck forgets it but leaves its PDF in the mirror: the mirror
+        # is an archive of converted decks, not a synchronised copy.
+        removed = [relative for relative in self._index if relative not in seen]
+        for relative in removed:
+            del self._index[relative]
+        if removed:
+            self._save_index()
+
+        return sorted(ready)
+
+    def process_once(self, is_cancelled: Optional[Callable[[], bool]] = None) -> Tuple[int, int]:
+        ready = self.scan()
+        if not ready:
+            return 0, 0
+
+        outputs = self._assign_outputs([relative for relative, _signature in ready])
+        jobs: List[Tuple[str, str]] = []
+        for relative, _signature in ready:
+            output_path = os.path.join(self._output_dir, outputs[relative])
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            jobs.append((os.path.join(self._source_dir, relative), output_path))
+            self._emit("queued", source=relative)
+
+        started = time.perf_counter()
+        failures = self._service.convert_jobs(jobs, is_cancelled=is_cancelled, owner="watch")
+
+        for index, (relative, signature) in enumerate(ready):
+            self._pending.pop(relative, None)
+            entry: Dict[str, Any] = {"stat": list(signature), "output": outputs[relative]}
+            if index in failures:
+                entry["error"] = failures[index]
+                self._emit("failed", source=relative, message=failures[index])
+            else:
+                self._emit("converted", source=relative, output=jobs[index][1])
+            self._index[relative] = entry
+        self._save_index()
+
+        converted = len(ready) - len(failures)
+        self._emit(
+            "batch",
+            converted=converted,
+            failed=len(failures),
+            elapsed_s=round(time.perf_counter() - started, 3),
+        )
+        return converted, len(failures)
+
+    def run(self, is_cancelled: Optional[Callable[[], bool]] = None) -> None:
+        token = cancellation_token(is_cancelled) or CancellationToken()
+        self._emit("watching", source=self._source_dir, output=self._output_dir)
+        while not token.is_cancelled():
+            try:
+                self.process_once(token)
+            except ConversionCancelledError:
+                return
+            token.wait(self._poll_interval)
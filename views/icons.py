@@ -7,12 +7,6 @@ import sys
 import os
 import tkinter as tk
 
-try:
-    from PIL import Image, ImageTk
-    HAS_PIL = True
-except ImportError:
-    HAS_PIL = False
-
 
 def setup_windows_taskbar():
     """Set Windows taskbar icon identity (must be called before tkinter window creation)."""
@@ -29,7 +23,7 @@ def get_app_icon_path() -> str:
 
 
 def apply_window_icon(window: tk.Tk):
-    """Apply assets/image.ico to a Tk/CTk window and return icon image refs."""
+    """Apply assets/image.ico to a Tk/CTk window and return icon image refs (filled in once idle)."""
     icon_path = get_app_icon_path()
     if not os.path.exists(icon_path):
         return []
@@ -42,13 +36,27 @@ def apply_window_icon(window: tk.Tk):
         except Exception:
             pass
 
-    if not HAS_PIL:
-        return []
+    # PIL is slow to import, so the high-resolution icon is loaded once the
+    # window is up; the returned list receives the image ref at that point.
+    photos = []
+    try:
+        window.after_idle(_apply_icon_photo, window, icon_path, photos)
+    except Exception:
+        pass
+    return photos
+
+
+def _apply_icon_photo(window: tk.Tk, icon_path: str, photos: list):
+    """Load the icon with PIL and set it as the window photo (no-op without PIL)."""
+    try:
+        from PIL import Image, ImageTk
+    except ImportError:
+        return
 
     try:
-        icon_image = Image.open(icon_path) # pyright: ignore[reportPossiblyUnboundVariable]
-        photo = ImageTk.PhotoImage(icon_image) # pyright: ignore[reportPossiblyUnboundVariable]
+        icon_image = Image.open(icon_path)
+        photo = ImageTk.PhotoImage(icon_image)
         window.iconphoto(True, photo) # pyright: ignore[reportArgumentType]
-        return [photo]
+        photos.append(photo)
     except Exception:
-        return []
+        pass
@@ -56,6 +56,7 @@ class MainView:
         self.on_new_task_tab: Optional[Callable[[], None]] = None
         self.on_close_task_tab: Optional[Callable[[str], None]] = None
         self.on_switch_task_tab: Optional[Callable[[str], None]] = None
+        self.on_redetect_backends: Optional[Callable[[], None]] = None
 
         self.add_files_btn: Optional[Any] = None
         self.remove_btn: Optional[Any] = None
@@ -67,8 +68,10 @@ class MainView:
         self.convert_separate_btn: Optional[Any] = None
         self.cancel_btn: Optional[Any] = None
         self.new_tab_btn: Optional[Any] = None
+        self.redetect_btn: Optional[Any] = None
 
         self.queue_label: Optional[Any] = None
+        self._convert_available = False
 
         self.drag_data = {"index": None}
         self._hover_index: Optional[int] = None
@@ -256,7 +259,17 @@ class MainView:
             text="Open output after conversion",
             variable=self.open_after_var,
             font=self.font_regular,
-        ).pack(anchor="w", padx=12, pady=(0, 10))
+        ).pack(anchor="w", padx=12, pady=(0, 6))
+
+        redetect_btn = cast(Any, ctk.CTkButton(
+            options,
+            text="Re-detect Backends",
+            command=lambda: self._invoke(self.on_redetect_backends),
+            width=150,
+            font=self.font_regular,
+        ))
+        redetect_btn.pack(anchor="w", padx=12, pady=(0, 10))
+        self.redetect_btn = redetect_btn
 
     def _setup_progress(self, parent) -> None:
         progress_frame = ctk.CTkFrame(parent)
@@ -392,10 +405,18 @@ class MainView:
             self.cancel_btn.configure(state="normal")
             set_button_cursor(self.cancel_btn, ["heart", "hand2", "arrow"])
         else:
-            self.convert_btn.configure(state="normal")
-            self.convert_separate_btn.configure(state="normal")
+            state = "normal" if self._convert_available else "disabled"
+            self.convert_btn.configure(state=state)
+            self.convert_separate_btn.configure(state=state)
             self.cancel_btn.pack_forget()
 
+    def set_convert_available(self, available: bool) -> None:
+        self._convert_available = available
+
+    def set_redetect_enabled(self, enabled: bool) -> None:
+        if self.redetect_btn is not None:
+            self.redetect_btn.configure(state="normal" if enabled else "disabled")
+
     def get_selected_index(self) -> Optional[int]:
         selection = self.file_listbox.curselection()
         return selection[0] if selection else None
@@ -411,11 +432,14 @@ class MainView:
             self.progress_bar.set(max(0.0, min(1.0, progress / 100.0)))
         self.root.update_idletasks()
 
-    def update_queue_status(self, queue_count: int) -> None:
+    def update_queue_status(self, queue_count: int, waiting_files: int = 0) -> None:
         if self.queue_label is None:
             return
         if queue_count > 0:
-            self.queue_label.configure(text=f"⚙️ {queue_count} task(s) running")
+            text = f"⚙️ {queue_count} task(s) running"
+            if waiting_files > 0:
+                text += f" - {waiting_files} file(s) waiting for a converter slot"
+            self.queue_label.configure(text=text)
         else:
             self.queue_label.configure(text="No running tasks")
 